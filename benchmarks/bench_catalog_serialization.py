@@ -0,0 +1,51 @@
+"""
+Compare rows/sec of the UniversityList read path against plain
+UniversitySerializer + DRF JSONRenderer.
+
+    python benchmarks/bench_catalog_serialization.py --rows 5000 --page-size 100
+"""
+import argparse
+
+import _django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    _django.setup()
+    from rest_framework.renderers import JSONRenderer
+
+    from universities.models import University
+    from universities.renderers import ORJSONRenderer
+    from universities.serializers import UniversityRowEncoder, UniversitySerializer
+    from universities.tests import seed_universities
+
+    with _django.test_database():
+        seed_universities(args.rows)
+        queryset = University.objects.order_by('id')
+        pages = [(offset, offset + args.page_size) for offset in range(0, args.rows, args.page_size)]
+        encoder = UniversityRowEncoder()
+
+        def serializer_path():
+            for start, end in pages:
+                JSONRenderer().render(UniversitySerializer(queryset[start:end], many=True).data)
+
+        def fast_path():
+            for start, end in pages:
+                ORJSONRenderer().render(encoder.encode(encoder.rows(queryset)[start:end]))
+
+        print(f'{args.rows} rows in pages of {args.page_size} (best of {args.repeat})')
+        baseline = None
+        for label, func in (('ModelSerializer + JSONRenderer', serializer_path), ('values_list + orjson', fast_path)):
+            elapsed = _django.timeit(func, args.repeat)
+            rate = args.rows / elapsed
+            baseline = baseline or rate
+            print(f'  {label:<32} {rate:>12,.0f} rows/s  ({rate / baseline:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare first-request latency of a fresh process with and without the
+gunicorn warm-up (universities.warmup.warm_up), against steady state.
+
+    python benchmarks/bench_first_request.py --universities 2000
+
+Each variant runs in a new interpreter. Seeding the test database runs
+some ORM code before the first request, so the cold numbers understate a
+real cold worker slightly.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import _django
+
+ENDPOINTS = [
+    ('university-list', {}),
+    ('university-facets', {}),
+    ('university-autocomplete', {'q': 'uni'}),
+    ('dashboard', {}),
+]
+
+
+def child(warm, universities):
+    _django.setup()
+    from django.core import signals
+    from django.db import close_old_connections
+    from django.test import RequestFactory
+    from django.urls import reverse
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from university_api.wsgi import application
+    from universities.tests import seed_universities, seed_users
+    from universities.warmup import warm_up
+
+    # Requests go through the real WSGI handler, which loads its middleware
+    # at start-up like a gunicorn worker (the test client does so lazily on
+    # the first request). As in the test client, connections must survive
+    # requests or the in-memory test database is lost.
+    signals.request_started.disconnect(close_old_connections)
+    signals.request_finished.disconnect(close_old_connections)
+    factory = RequestFactory(HTTP_HOST='localhost')
+    statuses = []
+
+    def start_response(status, headers):
+        statuses.append(status)
+
+    with _django.test_database():
+        student = seed_users(1, seed_universities(universities))[0]
+        token = f'Bearer {AccessToken.for_user(student)}'
+        if warm:
+            warm_up()
+
+        results = {}
+        for name, params in ENDPOINTS:
+            timings = []
+            for _ in range(2):
+                environ = factory.get(reverse(name), params, HTTP_AUTHORIZATION=token).environ
+                start = time.perf_counter()
+                b''.join(application(environ, start_response))
+                timings.append(time.perf_counter() - start)
+                assert statuses[-1].startswith('200'), (name, statuses[-1])
+            results[name] = timings
+        print(json.dumps(results))
+
+
+def run(warm, universities):
+    args = [sys.executable, __file__, '--child', 'warm' if warm else 'cold', '--universities', str(universities)]
+    result = subprocess.run(args, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--universities', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--child', choices=['cold', 'warm'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child == 'warm', args.universities)
+        return
+
+    cold = [run(False, args.universities) for _ in range(args.repeat)]
+    warm = [run(True, args.universities) for _ in range(args.repeat)]
+
+    def best(runs, name, index):
+        return min(result[name][index] for result in runs) * 1000
+
+    print(f'{args.universities} universities, best of {args.repeat} fresh processes (ms)')
+    print(f'  {"endpoint":<26} {"cold first":>11} {"warm first":>11} {"steady":>8}')
+    for name, _ in ENDPOINTS:
+        print(f'  {name:<26} {best(cold, name, 0):11.1f} {best(warm, name, 0):11.1f} {best(warm, name, 1):8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Report worker cold-start time: what a fresh process spends importing the
+project, loading the WSGI application and the URLconf before it can serve
+its first request.
+
+    python benchmarks/bench_startup.py --top 15
+
+Each run starts a new interpreter with `-X importtime`; the report shows the
+best total and the import time per top-level package of the last run, so
+heavy dependencies stand out.
+"""
+import argparse
+import collections
+import os
+import subprocess
+import sys
+
+import _django
+
+STARTUP = '''
+import os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'university_api.settings')
+from university_api.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(time.perf_counter() - start)
+'''
+
+
+def cold_start():
+    """Return (seconds, importtime lines) for one fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP.format(root=_django.ROOT)],
+        capture_output=True, text=True, check=True, env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+    )
+    return float(result.stdout.strip().splitlines()[-1]), result.stderr.splitlines()
+
+
+def self_time_by_package(lines):
+    totals = collections.Counter()
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        totals[name.strip().split('.')[0]] += int(self_us)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    best = float('inf')
+    for _ in range(args.repeat):
+        elapsed, lines = cold_start()
+        best = min(best, elapsed)
+
+    totals = self_time_by_package(lines)
+    print(f'cold start (imports + WSGI app + URLconf): {best * 1000:.1f} ms (best of {args.repeat})')
+    print(f'  {"package":<28} {"import ms":>10}')
+    for name, micros in totals.most_common(args.top):
+        print(f'  {name:<28} {micros / 1000:10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Measure the per-request overhead of the token bucket throttle against DRF's
+built-in sliding-window throttle.
+
+    python benchmarks/bench_throttle.py --requests 20000
+
+Uses whatever cache CACHES configures: the local-memory cache by default,
+Redis when REDIS_URL is set.
+"""
+import argparse
+
+import _django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    _django.setup()
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.cache import cache, caches
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from rest_framework.throttling import ScopedRateThrottle
+
+    from universities.throttling import ScopedTokenBucketThrottle
+
+    class View:
+        throttle_scope = 'bench'
+
+    rates = {'bench': f'{args.requests * 10}/min'}
+    ScopedTokenBucketThrottle.THROTTLE_RATES = rates
+    ScopedRateThrottle.THROTTLE_RATES = rates
+
+    factory = APIRequestFactory()
+    requests = []
+    for i in range(args.clients):
+        request = Request(factory.get('/api/universities/', REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}'))
+        request.user = AnonymousUser()
+        requests.append(request)
+    view = View()
+
+    def run(throttle_class):
+        def func():
+            cache.clear()
+            for i in range(args.requests):
+                throttle_class().allow_request(requests[i % args.clients], view)
+        return func
+
+    backend = caches['default'].__class__.__name__
+    print(f'{args.requests} requests from {args.clients} clients, {backend} (best of {args.repeat})')
+    for label, throttle_class in (('token bucket', ScopedTokenBucketThrottle), ('DRF ScopedRateThrottle', ScopedRateThrottle)):
+        elapsed = _django.timeit(run(throttle_class), args.repeat)
+        print(f'  {label:<24} {elapsed / args.requests * 1e6:8.2f} us/request')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Measure payment webhook bursts: signature verification alone, comparing the
+raw-body HMAC with the old parse + re-serialize + HMAC path, and whole
+requests through the WSGI handler for valid, replayed and forged deliveries.
+
+    python benchmarks/bench_webhook.py --requests 2000
+
+Runs against a throwaway test database with the local-memory cache; the
+webhook throttle is lifted for the burst.
+"""
+import argparse
+import hashlib
+import hmac
+import io
+import json
+
+import _django
+
+SECRET = 'bench-secret'
+
+
+def chapa_payload(user_id, i):
+    """A delivery shaped like Chapa's transaction webhook (about 700 bytes)."""
+    return {
+        'event': 'charge.success',
+        'first_name': 'Student', 'last_name': str(i), 'email': f'student{i}@example.com', 'mobile': None,
+        'currency': 'ETB', 'amount': '100.00', 'charge': '3.50', 'status': 'success', 'mode': 'live',
+        'reference': f'AP{i:010d}', 'created_at': '2026-10-19T10:00:00.000000Z', 'updated_at': '2026-10-19T10:00:05.000000Z',
+        'type': 'API', 'tx_ref': f'unifinder-{user_id}-{i:032x}', 'payment_method': 'telebirr',
+        'customization': {'title': 'UNI-FINDER Subscription', 'description': '1-Month Subscription Renewal', 'logo': None},
+        'meta': None,
+    }
+
+
+def sign(body):
+    return hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    _django.setup()
+    from django.contrib.auth.models import User
+    from django.core import signals
+    from django.core.cache import cache
+    from django.db import close_old_connections
+    from django.test import RequestFactory, override_settings
+    from rest_framework.settings import api_settings
+
+    from university_api.wsgi import application
+    from universities.parsers import ORJSONParser
+    from universities.throttling import ScopedTokenBucketThrottle
+    from universities.webhooks import verify_payload
+
+    ScopedTokenBucketThrottle.THROTTLE_RATES = {**api_settings.DEFAULT_THROTTLE_RATES, 'webhook': f'{args.requests * 100}/min'}
+    signals.request_started.disconnect(close_old_connections)
+    signals.request_finished.disconnect(close_old_connections)
+
+    with _django.test_database(), override_settings(CHAPA_WEBHOOK_SECRET=SECRET):
+        user = User.objects.create_user(username='payer')
+        bodies = [json.dumps(chapa_payload(user.pk, i), indent=2).encode() for i in range(args.requests)]
+        signatures = [sign(body) for body in bodies]
+
+        def legacy_verify():
+            for body, signature in zip(bodies, signatures):
+                data = ORJSONParser().parse(io.BytesIO(body))
+                hmac.compare_digest(signature, sign(json.dumps(data, separators=(',', ':')).encode()))
+
+        def raw_verify():
+            for body, signature in zip(bodies, signatures):
+                verify_payload(body, [signature], SECRET)
+
+        print(f'{args.requests} webhooks of ~{len(bodies[0])} bytes (best of {args.repeat})')
+        print('  verification only')
+        for label, func in (('parse + json.dumps + HMAC', legacy_verify), ('raw-body HMAC + orjson', raw_verify)):
+            elapsed = _django.timeit(func, args.repeat)
+            print(f'    {label:<30} {elapsed / args.requests * 1e6:8.1f} us/webhook')
+
+        factory = RequestFactory(HTTP_HOST='localhost')
+
+        def burst(signature_for, fresh):
+            def func():
+                if fresh:
+                    cache.clear()
+                for body, signature in zip(bodies, signatures):
+                    environ = factory.generic(
+                        'POST', '/api/chapa-webhook/', body, content_type='application/json',
+                        HTTP_CHAPA_SIGNATURE=signature_for(signature),
+                    ).environ
+                    b''.join(application(environ, lambda status, headers: None))
+            return func
+
+        print('  whole requests through the WSGI handler')
+        scenarios = (
+            ('valid deliveries', burst(lambda signature: signature, fresh=True)),
+            ('replayed deliveries', burst(lambda signature: signature, fresh=False)),
+            ('forged signatures', burst(lambda signature: '0' * 64, fresh=True)),
+        )
+        for label, func in scenarios:
+            elapsed = _django.timeit(func, args.repeat)
+            print(f'    {label:<30} {elapsed / args.requests * 1e6:8.1f} us/request  ({args.requests / elapsed:,.0f}/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -9,4 +9,7 @@ pip install -r requirements.txt
 python manage.py collectstatic --noinput
 
 # Apply database migrations
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+# Pre-generate the catalog snapshot for offline clients
+python manage.py export_catalog
@@ -0,0 +1,82 @@
+"""
+Gunicorn configuration, loaded automatically from the project root:
+
+    gunicorn
+
+The app is preloaded and warmed in the master, then forked, so workers
+share its memory and start serving with the URLconf, serializers and
+catalog caches already primed (see universities/warmup.py).
+
+Environment:
+    PORT                  port to bind (default 8000)
+    WEB_CONCURRENCY       worker processes (default derived from CPU cores;
+                          more than one requires REDIS_URL)
+    GUNICORN_WORKER       'gthread' (default, WSGI) or 'uvicorn' (ASGI,
+                          needs the uvicorn package)
+    GUNICORN_THREADS      threads per gthread worker (default 4)
+    PROMETHEUS_MULTIPROC_DIR
+                          directory where workers share request metrics
+                          (default: a fresh directory under the temp dir)
+"""
+import os
+import shutil
+import tempfile
+
+from django.db import connections
+
+# Workers write their request metrics here so /metrics on any of them reports
+# every worker (see universities/metrics.py). It must be set before
+# prometheus_client is imported, and emptied so counters restart with the server.
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'unifinder-metrics'))
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir)
+
+cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+# Without REDIS_URL every worker would have its own in-memory cache, so cache
+# invalidations, throttle buckets and webhook replay nonces would not reach the
+# other workers (see CACHES in settings.py). Run a single worker then.
+shared_cache = bool(os.environ.get('REDIS_URL'))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+preload_app = True
+
+if os.environ.get('GUNICORN_WORKER', 'gthread') == 'uvicorn':
+    wsgi_app = 'university_api.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    # Event loop workers are not blocked by I/O waits, so aim for one per core.
+    workers = int(os.environ.get('WEB_CONCURRENCY', cores if shared_cache else 1))
+else:
+    wsgi_app = 'university_api.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+    workers = int(os.environ.get('WEB_CONCURRENCY', cores + 1 if shared_cache else 1))
+
+if workers > 1 and not shared_cache:
+    raise RuntimeError(f'WEB_CONCURRENCY={workers} requires REDIS_URL: without it each worker has its own cache.')
+
+accesslog = '-'
+
+
+def when_ready(server):
+    from universities.warmup import warm_up
+
+    timings = warm_up()
+    # Connections must not be shared with forked workers.
+    connections.close_all()
+    server.log.info('Warmed up master: %s', _format(timings))
+
+
+def post_worker_init(worker):
+    from universities.warmup import warm_up
+
+    worker.log.info('Warmed up worker %s: %s', worker.pid, _format(warm_up()))
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def _format(timings):
+    return ', '.join(f'{name} {seconds * 1000:.1f}ms' for name, seconds in timings.items())
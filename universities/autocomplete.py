@@ -0,0 +1,116 @@
+"""
+In-process prefix index for search-box autocomplete.
+
+University names, countries and cities are normalized and stored in one
+sorted list, so a prefix lookup is two binary searches. Names are also
+indexed from every word start ("tech" finds "Technical University of
+Munich" and "Munich Tech"). Each worker rebuilds its index lazily from a
+single query whenever the catalog version changes.
+"""
+import heapq
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+
+from .catalog import get_catalog_version
+from .models import University
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+# Short prefixes match large parts of the catalog; their results are memoized.
+# Only letters and digits at the default limit are kept, so the memo is bounded
+# by the number of such prefixes rather than by what clients send.
+MEMOIZED_PREFIX_LENGTH = 2
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).strip()
+
+
+def _word_starts(text):
+    yield 0
+    for i in range(1, len(text)):
+        if text[i - 1] == ' ' and text[i] != ' ':
+            yield i
+
+
+class PrefixIndex:
+    def __init__(self, entries):
+        """`entries` are (label, type, id, weight) tuples; higher weights rank first."""
+        keyed = []
+        for label, kind, pk, weight in entries:
+            normalized = normalize(label)
+            for start in _word_starts(normalized):
+                # The rank sorts by weight, then prefers whole-label matches.
+                keyed.append((normalized[start:], (-weight, start, label), kind, pk))
+        keyed.sort(key=lambda item: item[0])
+        self.keys = [item[0] for item in keyed]
+        self.entries = [item[1:] for item in keyed]
+        self.memo = {}
+
+    def search(self, prefix, limit):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        if len(prefix) <= MEMOIZED_PREFIX_LENGTH and prefix.isascii() and prefix.isalnum() and limit == DEFAULT_LIMIT:
+            if prefix not in self.memo:
+                self.memo[prefix] = self._search(prefix, limit)
+            return self.memo[prefix]
+        return self._search(prefix, limit)
+
+    def _search(self, prefix, limit):
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + '\uffff', lo)
+        results, seen = [], set()
+        for rank, kind, pk in heapq.nsmallest(limit * 4, self.entries[lo:hi], key=lambda entry: entry[0]):
+            label = rank[2]
+            identity = (kind, pk if pk is not None else label)
+            if identity in seen:
+                continue
+            seen.add(identity)
+            result = {'type': kind, 'label': label}
+            if pk is not None:
+                result['id'] = pk
+            results.append(result)
+            if len(results) == limit:
+                break
+        return results
+
+
+def build_index():
+    """Build the index from one query: universities ranked by popularity, places by university count."""
+    entries = []
+    countries, cities = Counter(), Counter()
+    for pk, name, country, city, popularity in University.objects.values_list('id', 'name', 'country', 'city', 'popularity'):
+        entries.append((name, 'university', pk, popularity))
+        if country:
+            countries[country] += 1
+        if city:
+            cities[city] += 1
+    entries.extend((country, 'country', None, count) for country, count in countries.items())
+    entries.extend((city, 'city', None, count) for city, count in cities.items())
+    return PrefixIndex(entries)
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def get_index():
+    """Return this worker's index, rebuilding it if the catalog changed since it was built."""
+    global _index, _index_version
+    version = get_catalog_version()
+    if _index is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != version:
+                _index = build_index()
+                _index_version = version
+    return _index
+
+
+def autocomplete(prefix, limit):
+    return get_index().search(prefix, limit)
@@ -0,0 +1,47 @@
+"""
+Version counters for cache invalidation.
+
+Cached values embed the current version of whatever they were computed from in
+their cache key. Bumping the version makes every such key unreachable at once;
+the stale entries are never read again and simply expire.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _seed():
+    # Seed from the clock so a version lost to eviction never repeats an older one.
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = _seed()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def get_versions(keys):
+    """Fetch several versions with a single cache round trip."""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = get_version(key)
+    return versions
+
+
+def bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _seed()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def bump_versions(keys):
+    for key in keys:
+        bump_version(key)
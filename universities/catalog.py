@@ -0,0 +1,107 @@
+"""
+Cached aggregations over the university catalog.
+
+Cache entries are keyed by a catalog version that is bumped whenever a
+University is saved or deleted (see signals.py).
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .cache_versions import bump_version, get_version
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+FACET_FIELDS = ['country', 'city', 'course_offered']
+
+# Lower bounds of the fee histogram buckets; the last bucket is open-ended.
+FEE_HISTOGRAM_EDGES = {
+    'application_fee': [0, 25, 50, 75, 100, 150, 200],
+    'tuition_fee': [0, 1000, 5000, 10000, 20000, 30000, 50000],
+}
+
+# Query parameters that change which page is shown but not the filtered set.
+NON_FILTER_PARAMS = {'page', 'page_size', 'format', 'ordering'}
+
+# Filters relative to today; keys for them also embed the date.
+DATE_RELATIVE_PARAMS = {'deadline_within'}
+
+
+def get_catalog_version():
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    return bump_version(CATALOG_VERSION_KEY)
+
+
+def filter_cache_key(prefix, query_params):
+    """Build a cache key from the catalog version and the filtering query parameters."""
+    items = sorted(
+        (key, value)
+        for key in query_params
+        if key not in NON_FILTER_PARAMS
+        for value in query_params.getlist(key)
+    )
+    if DATE_RELATIVE_PARAMS.intersection(query_params):
+        items.append(('date', timezone.now().date().isoformat()))
+    digest = hashlib.sha1(repr(items).encode('utf-8')).hexdigest()
+    return f'{prefix}:{get_catalog_version()}:{digest}'
+
+
+def compute_facets(queryset):
+    """
+    Count the universities in `queryset` per country, city and course, and
+    bucket them into application and tuition fee histograms.
+    """
+    queryset = queryset.order_by()
+    facets = {}
+    for field in FACET_FIELDS:
+        rows = (
+            queryset.exclude(**{field: ''})
+            .values(field)
+            .annotate(count=Count('id'))
+            .order_by('-count', field)
+        )
+        facets[field] = [{'value': row[field], 'count': row['count']} for row in rows]
+
+    buckets = {}
+    aggregates = {'total': Count('id')}
+    for field, edges in FEE_HISTOGRAM_EDGES.items():
+        buckets[field] = []
+        for i, lower in enumerate(edges):
+            upper = edges[i + 1] if i + 1 < len(edges) else None
+            condition = Q(**{f'{field}__gte': lower})
+            if upper is not None:
+                condition &= Q(**{f'{field}__lt': upper})
+            alias = f'{field}_{i}'
+            aggregates[alias] = Count('id', filter=condition)
+            buckets[field].append((alias, lower, upper))
+    counts = queryset.aggregate(**aggregates)
+
+    facets['total'] = counts['total']
+    for field, field_buckets in buckets.items():
+        facets[field] = [
+            {'min': lower, 'max': upper, 'count': counts[alias]}
+            for alias, lower, upper in field_buckets
+        ]
+    return facets
+
+
+def facets_cache_key(query_params):
+    return filter_cache_key('facets', query_params)
+
+
+def get_facets(queryset, key):
+    """
+    Return the facets for a filtered catalog queryset, computing them at most
+    once per catalog version. `key` comes from facets_cache_key().
+    """
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, timeout=settings.FACETS_CACHE_TIMEOUT)
+    return facets
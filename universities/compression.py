@@ -0,0 +1,76 @@
+"""
+Content-encoding codecs for API responses.
+
+gzip is always available; brotli and zstd are used when the optional
+`brotli` and `zstandard` packages are installed. Levels favour CPU cost over
+the last few percent of ratio, since every uncached response pays for them.
+"""
+import gzip
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=settings.API_COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=settings.API_COMPRESSION_BROTLI_QUALITY)
+
+
+def _zstd(data):
+    return zstandard.ZstdCompressor(level=settings.API_COMPRESSION_ZSTD_LEVEL).compress(data)
+
+
+# In order of server preference when the client accepts several.
+CODECS = {}
+if brotli is not None:
+    CODECS['br'] = _brotli
+if zstandard is not None:
+    CODECS['zstd'] = _zstd
+CODECS['gzip'] = _gzip
+
+
+def compress(encoding, data):
+    return CODECS[encoding](data)
+
+
+def compress_stream(chunks):
+    """gzip a streaming response chunk by chunk."""
+    compressor = zlib.compressobj(settings.API_COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def negotiate(accept_encoding, streaming=False):
+    """Pick the preferred codec the client accepts (q > 0), or None."""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    candidates = ['gzip'] if streaming else CODECS
+    for encoding in candidates:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
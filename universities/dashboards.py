@@ -0,0 +1,105 @@
+"""
+Per-user dashboard caches.
+
+Every user has a dashboard version that is bumped whenever their dashboard
+lists or profile change (see signals.py). Cached values derived from a
+dashboard embed that version, plus the catalog version when they also depend
+on university data.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .cache_versions import bump_versions, get_versions
+from .catalog import CATALOG_VERSION_KEY
+from .models import University, UserDashboard
+from .serializers import UserDashboardSerializer
+
+DEADLINE_FEED_TIMEOUT = 60 * 60 * 24
+DASHBOARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def dashboard_version_key(user_id):
+    return f'dashboard:{user_id}:version'
+
+
+def bump_dashboard_versions(user_ids):
+    bump_versions([dashboard_version_key(user_id) for user_id in user_ids])
+
+
+def dashboard_cache_key(user_id):
+    version_key = dashboard_version_key(user_id)
+    versions = get_versions([version_key, CATALOG_VERSION_KEY])
+    return f'dashboard:{user_id}:{versions[version_key]}:{versions[CATALOG_VERSION_KEY]}'
+
+
+def get_serialized_dashboard(user, key):
+    """
+    The UserDashboardSerializer output for `user`, cached until their
+    dashboard, their name or the catalog changes. `key` comes from
+    dashboard_cache_key().
+    """
+    data = cache.get(key)
+    if data is None:
+        # get_or_create ensures a dashboard exists if the signal failed for some reason
+        dashboard, _ = UserDashboard.objects.select_related('user').get_or_create(user=user)
+        data = UserDashboardSerializer(dashboard).data
+        cache.set(key, data, timeout=DASHBOARD_CACHE_TIMEOUT)
+    return data
+
+
+def _compute_upcoming_deadlines(user_id, today, days):
+    window = (today, today + timedelta(days=days))
+    lists = {
+        'favorites': UserDashboard.favorites.through,
+        'planning_to_apply': UserDashboard.planning_to_apply.through,
+    }
+    memberships = {
+        f'in_{name}': Exists(through.objects.filter(userdashboard__user_id=user_id, university_id=OuterRef('pk')))
+        for name, through in lists.items()
+    }
+    rows = (
+        University.objects
+        .filter(Q(deadline_undergrad__range=window) | Q(deadline_grad__range=window))
+        .annotate(**memberships)
+        .filter(Q(in_favorites=True) | Q(in_planning_to_apply=True))
+        .values('id', 'name', 'country', 'deadline_undergrad', 'deadline_grad', *memberships)
+    )
+
+    feed = []
+    for row in rows:
+        deadlines = [d for d in (row['deadline_undergrad'], row['deadline_grad']) if d and window[0] <= d <= window[1]]
+        feed.append({
+            'id': row['id'],
+            'name': row['name'],
+            'country': row['country'],
+            'deadline_undergrad': row['deadline_undergrad'],
+            'deadline_grad': row['deadline_grad'],
+            'next_deadline': min(deadlines),
+            'lists': [name for name in lists if row[f'in_{name}']],
+        })
+    feed.sort(key=lambda item: (item['next_deadline'], item['name']))
+    return feed
+
+
+def upcoming_deadlines_cache_key(user_id, days):
+    today = timezone.now().date()
+    version_key = dashboard_version_key(user_id)
+    versions = get_versions([version_key, CATALOG_VERSION_KEY])
+    return f'deadlines:{user_id}:{versions[version_key]}:{versions[CATALOG_VERSION_KEY]}:{today}:{days}'
+
+
+def get_upcoming_deadlines(user_id, days, key):
+    """
+    Universities from the user's favorites and planning_to_apply lists with a
+    deadline in the next `days` days, soonest first. Computed with a single
+    query and cached until the user's dashboard or the catalog changes.
+    `key` comes from upcoming_deadlines_cache_key().
+    """
+    feed = cache.get(key)
+    if feed is None:
+        feed = _compute_upcoming_deadlines(user_id, timezone.now().date(), days)
+        cache.set(key, feed, timeout=DEADLINE_FEED_TIMEOUT)
+    return feed
@@ -0,0 +1,132 @@
+"""
+Versioned catalog snapshots for offline and mobile clients.
+
+A snapshot is a JSON Lines file: a header line with the catalog version
+followed by one CatalogExportSerializer object per line. It is written once per
+catalog version, pre-compressed with WhiteNoise's compressor (gzip, plus
+brotli when the `brotli` package is installed) and served through WhiteNoise
+so content negotiation, ETags and conditional requests behave exactly like
+static files.
+"""
+import json
+import os
+import uuid
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+from whitenoise.base import WhiteNoise
+from whitenoise.compress import Compressor
+
+from .models import CatalogChange, University
+from .serializers import CatalogExportSerializer
+
+SNAPSHOT_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def _add_snapshot_headers(headers, path, url):
+    # Snapshots are subscriber-only, so shared caches must not store them.
+    headers['Cache-Control'] = f'private, max-age={WhiteNoise.FOREVER}, immutable'
+
+
+# Serves snapshot files; nothing is registered up front because snapshots
+# are created at runtime, after WhiteNoise has scanned its static roots.
+snapshot_server = WhiteNoise(
+    None,
+    allow_all_origins=False,
+    mimetypes={'.jsonl': SNAPSHOT_CONTENT_TYPE},
+    add_headers_function=_add_snapshot_headers,
+)
+
+
+def get_export_version():
+    return CatalogChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def snapshot_path(version):
+    return os.path.join(settings.CATALOG_EXPORT_ROOT, f'catalog-v{version}.jsonl')
+
+
+def _dumps(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def _write_lines(path, header, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(_dumps(header) + '\n')
+        for row in rows:
+            f.write(_dumps(row) + '\n')
+
+
+def write_snapshot(version=None):
+    """
+    Write the snapshot for `version` (default: the current version) unless it
+    already exists, and return its path. Universities changed while the
+    snapshot is being written may appear with newer data; clients converge
+    when they next apply the changes since `version`.
+    """
+    if version is None:
+        version = get_export_version()
+    path = snapshot_path(version)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(settings.CATALOG_EXPORT_ROOT, exist_ok=True)
+    serializer = CatalogExportSerializer()
+    rows = (
+        serializer.to_representation(university)
+        for university in University.objects.order_by('id').iterator(chunk_size=500)
+    )
+    header = {'type': 'snapshot', 'version': version, 'generated_at': timezone.now()}
+
+    # Write under a temporary name and rename the compressed variants before
+    # the plain file, so readers never see a partially written snapshot.
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    _write_lines(tmp_path, header, rows)
+    for compressed in Compressor(quiet=True).compress(tmp_path):
+        suffix = compressed[len(tmp_path):]
+        os.replace(compressed, path + suffix)
+    os.replace(tmp_path, path)
+
+    prune_snapshots(keep=settings.CATALOG_EXPORT_KEEP)
+    return path
+
+
+def prune_snapshots(keep):
+    """Delete all but the `keep` newest snapshots (and their compressed variants)."""
+    root = settings.CATALOG_EXPORT_ROOT
+    versions = sorted(
+        int(name[len('catalog-v'):-len('.jsonl')])
+        for name in os.listdir(root)
+        if name.startswith('catalog-v') and name.endswith('.jsonl')
+    )
+    for version in versions[:-keep] if keep else versions:
+        for suffix in ('', '.gz', '.br'):
+            try:
+                os.remove(snapshot_path(version) + suffix)
+            except FileNotFoundError:
+                pass
+
+
+def get_changes(since):
+    """
+    Return (version, lines) where `lines` are the JSON Lines describing every
+    university created, updated or deleted after version `since`.
+    """
+    latest_actions = {}
+    version = since
+    for change_id, university_id, action in (
+        CatalogChange.objects.filter(id__gt=since).order_by('id').values_list('id', 'university_id', 'action')
+    ):
+        latest_actions[university_id] = action
+        version = change_id
+
+    upserted = [pk for pk, action in latest_actions.items() if action == 'upsert']
+    serializer = CatalogExportSerializer()
+    lines = [_dumps({'type': 'changes', 'since': since, 'version': version})]
+    for university in University.objects.filter(pk__in=upserted).order_by('id'):
+        lines.append(_dumps({'op': 'upsert', 'data': serializer.to_representation(university)}))
+    for pk, action in sorted(latest_actions.items()):
+        if action == 'delete':
+            lines.append(_dumps({'op': 'delete', 'id': pk}))
+    return version, lines
@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+import django_filters
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.filters import OrderingFilter
+
+from .models import University
+
+
+class UniversityFilter(django_filters.FilterSet):
+    # Universities with either deadline falling within the next N days.
+    deadline_within = django_filters.NumberFilter(method='filter_deadline_within', min_value=0, max_value=365)
+
+    class Meta:
+        model = University
+        fields = {
+            'country': ['icontains'],
+            'city': ['icontains'],
+            'course_offered': ['icontains'],
+            'application_fee': ['lte'],
+            'tuition_fee': ['lte'],
+            'deadline_undergrad': ['gte', 'lte'],
+            'deadline_grad': ['gte', 'lte'],
+            'links_ok': ['exact'],
+            'links_checked_at': ['lte'],
+        }
+
+    def filter_deadline_within(self, queryset, name, value):
+        today = timezone.now().date()
+        window = (today, today + timedelta(days=int(value)))
+        return queryset.filter(Q(deadline_undergrad__range=window) | Q(deadline_grad__range=window))
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    Appends `id` to the requested ordering, so universities with equal sort
+    values keep the same order and page boundaries stay stable.
+    """
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and not {'id', '-id'}.intersection(ordering):
+            ordering = [*ordering, 'id']
+        return ordering
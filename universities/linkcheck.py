@@ -0,0 +1,180 @@
+"""
+Concurrent health checks of university and application links.
+
+Unique URLs are checked from an asyncio event loop with at most
+`concurrency` requests in flight and request starts to the same host spaced
+at least `per_host_interval` seconds apart. Each request is a blocking
+urllib3 call on a thread pool; the pools are shared, so keep-alive
+connections to a host are reused. HEAD is tried first and GET is used when
+the server answers HEAD with an error, since many sites do not support it.
+
+Results are saved in batches as they come in, so an interrupted run keeps
+what it has checked so far.
+"""
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import urllib3
+from django.utils import timezone
+
+from .catalog import bump_catalog_version
+from .models import University
+
+USER_AGENT = 'UniFinder-LinkChecker/1.0'
+MAX_REDIRECTS = 5
+SAVE_BATCH_SIZE = 100
+LINK_FIELDS = {'university_link': 'university_link_status', 'application_link': 'application_link_status'}
+
+
+def is_healthy(status):
+    return status is not None and 200 <= status < 400
+
+
+class HostRateLimiter:
+    """Hands out start times at least `interval` seconds apart per host."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_start = {}
+
+    async def wait(self, host):
+        now = time.monotonic()
+        start = max(now, self.next_start.get(host, now))
+        self.next_start[host] = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def fetch_status(pool, url):
+    """Return the final HTTP status of `url` after redirects, or 0 if it could not be fetched."""
+    status = 0
+    retries = urllib3.Retry(connect=1, read=False, redirect=MAX_REDIRECTS, raise_on_redirect=False)
+    for method in ('HEAD', 'GET'):
+        try:
+            response = pool.request(method, url, preload_content=False, retries=retries)
+        except (urllib3.exceptions.HTTPError, ValueError):
+            return status
+        response.drain_conn()
+        response.release_conn()
+        status = response.status
+        if status < 400:
+            break
+    return status
+
+
+def _interleave_hosts(urls):
+    """Order URLs round-robin by host so rate-limited hosts do not hold every slot."""
+    by_host = defaultdict(list)
+    for url in sorted(urls):
+        by_host[urlsplit(url).hostname or ''].append(url)
+    return [url for batch in itertools.zip_longest(*by_host.values()) for url in batch if url is not None]
+
+
+async def _check_all(urls, concurrency, per_host_interval, timeout, report):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = HostRateLimiter(per_host_interval)
+    pool = urllib3.PoolManager(
+        num_pools=max(concurrency, 10), maxsize=concurrency,
+        headers={'User-Agent': USER_AGENT}, timeout=urllib3.Timeout(connect=timeout, read=timeout),
+    )
+
+    async def check(url):
+        async with semaphore:
+            await limiter.wait(urlsplit(url).hostname or '')
+            report((url, await loop.run_in_executor(executor, fetch_status, pool, url)))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        await asyncio.gather(*(check(url) for url in _interleave_hosts(urls)))
+    pool.clear()
+
+
+def iter_url_statuses(urls, concurrency=20, per_host_interval=1.0, timeout=10.0):
+    """
+    Check every URL in `urls` and yield (url, status) pairs as checks finish.
+
+    The event loop runs in a background thread: Django refuses database
+    queries from a thread with a running loop, and this way the caller can
+    save results while later URLs are still being checked.
+    """
+    results = queue.Queue()
+    done = object()
+
+    def run():
+        try:
+            asyncio.run(_check_all(set(urls), concurrency, per_host_interval, timeout, results.put))
+        except Exception as exc:
+            results.put(exc)
+        results.put(done)
+
+    threading.Thread(target=run, name='linkcheck', daemon=True).start()
+    while True:
+        result = results.get()
+        if result is done:
+            return
+        if isinstance(result, Exception):
+            raise result
+        yield result
+
+
+def check_urls(urls, **options):
+    """Check every URL in `urls` and return a {url: status} dict."""
+    return dict(iter_url_statuses(urls, **options))
+
+
+def check_university_links(queryset=None, batch_size=SAVE_BATCH_SIZE, **options):
+    """
+    Check the links of every university in `queryset` (default: all) and
+    store the results, `batch_size` universities at a time as their links
+    finish. Returns (universities checked, universities with a broken link).
+    Options are passed to iter_url_statuses().
+    """
+    queryset = University.objects.all() if queryset is None else queryset
+    links = {pk: links for pk, *links in queryset.values_list('id', *LINK_FIELDS)}
+    # Links each university still waits on, and the universities using each URL.
+    pending = {pk: {url for url in urls if url} for pk, urls in links.items()}
+    universities_by_url = defaultdict(list)
+    for pk, urls in pending.items():
+        for url in urls:
+            universities_by_url[url].append(pk)
+
+    statuses = {}
+    batch = []
+    checked = broken = 0
+
+    def finish(pk):
+        university = University(pk=pk, links_checked_at=timezone.now())
+        for url, status_field in zip(links[pk], LINK_FIELDS.values()):
+            setattr(university, status_field, statuses.get(url))
+        university.links_ok = all(is_healthy(statuses[url]) for url in links[pk] if url)
+        batch.append(university)
+
+    def save():
+        nonlocal checked, broken
+        University.objects.bulk_update(batch, [*LINK_FIELDS.values(), 'links_ok', 'links_checked_at'])
+        # Filtered catalog caches (e.g. ?links_ok=false) are keyed by the catalog version.
+        bump_catalog_version()
+        checked += len(batch)
+        broken += sum(not university.links_ok for university in batch)
+        batch.clear()
+
+    for pk, urls in pending.items():
+        if not urls:
+            finish(pk)
+    for url, status in iter_url_statuses(universities_by_url, **options):
+        statuses[url] = status
+        for pk in universities_by_url[url]:
+            pending[pk].discard(url)
+            if not pending[pk]:
+                finish(pk)
+        if len(batch) >= batch_size:
+            save()
+    if batch:
+        save()
+    return checked, broken
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from universities.linkcheck import check_university_links
+from universities.models import University
+
+
+class Command(BaseCommand):
+    help = "Check every university_link and application_link concurrently and store their status."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=20, help="Maximum requests in flight.")
+        parser.add_argument('--per-host-interval', type=float, default=1.0, help="Minimum seconds between requests to one host.")
+        parser.add_argument('--timeout', type=float, default=10.0, help="Connect and read timeout in seconds.")
+        parser.add_argument('--stale-hours', type=float, default=0, help="Only recheck universities not checked for this many hours.")
+
+    def handle(self, *args, **options):
+        queryset = University.objects.all()
+        if options['stale_hours']:
+            cutoff = timezone.now() - timedelta(hours=options['stale_hours'])
+            queryset = queryset.filter(Q(links_checked_at__isnull=True) | Q(links_checked_at__lt=cutoff))
+        checked, broken = check_university_links(
+            queryset,
+            concurrency=options['concurrency'],
+            per_host_interval=options['per_host_interval'],
+            timeout=options['timeout'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} universities, {broken} with a broken link."))
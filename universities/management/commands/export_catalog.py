@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from universities.exports import get_export_version, write_snapshot
+
+
+class Command(BaseCommand):
+    help = "Write the catalog snapshot for the current catalog version if it does not exist yet."
+
+    def handle(self, *args, **options):
+        version = get_export_version()
+        path = write_snapshot(version)
+        self.stdout.write(self.style.SUCCESS(f"Catalog snapshot v{version}: {path}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from universities.popularity import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized popularity counters on every university from the dashboard lists."
+
+    def handle(self, *args, **options):
+        total = reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled popularity counters for {total} universities."))
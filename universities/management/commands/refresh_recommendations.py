@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from universities.recommendations import refresh_similarities
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed similar-universities table from dashboard co-occurrence."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=20, help="Neighbours stored per university.")
+
+    def handle(self, *args, **options):
+        count = refresh_similarities(top_k=options['top_k'])
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} similarity rows."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from universities.reminders import send_reminders
+
+
+class Command(BaseCommand):
+    help = "Email and text users about approaching application deadlines and subscription expiry."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--deadline-days', type=int, help="Remind about deadlines this many days ahead.")
+        parser.add_argument('--subscription-days', type=int, help="Remind about subscriptions ending this many days ahead.")
+        parser.add_argument('--batch-size', type=int, help="Messages sent per batch.")
+        parser.add_argument('--batch-interval', type=float, help="Seconds to wait between batches.")
+
+    def handle(self, *args, **options):
+        sent = send_reminders(
+            deadline_days=options['deadline_days'],
+            subscription_days=options['subscription_days'],
+            batch_size=options['batch_size'],
+            batch_interval=options['batch_interval'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent['email']} emails and {sent['sms']} text messages."))
@@ -0,0 +1,95 @@
+"""
+Request metrics in the Prometheus format.
+
+Counters are kept with prometheus_client. Under gunicorn every worker writes
+its samples to PROMETHEUS_MULTIPROC_DIR (set up by gunicorn.conf.py), and
+/metrics on any worker reports the sum over all of them, so scrapes that land
+on different workers see the same series. Without that variable, as under
+runserver and in tests, the counters live in this process.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST as PROMETHEUS_CONTENT_TYPE, CollectorRegistry, Counter, Histogram, disable_created_metrics,
+    generate_latest, multiprocess,
+)
+
+METRIC_PREFIX = 'unifinder'
+
+# Upper bounds (in seconds) of the request duration histogram buckets.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# The *_created series would double the output for no use here.
+disable_created_metrics()
+
+
+class QueryRecorder:
+    """
+    A database execute wrapper that counts queries and the time spent running them.
+    Install it with `connection.execute_wrapper(recorder)`.
+    """
+    def __init__(self, record_sql=False):
+        self.count = 0
+        self.duration = 0.0
+        self.queries = [] if record_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if self.queries is not None:
+                self.queries.append({'sql': sql, 'time': round(elapsed, 6)})
+
+
+class MetricsRegistry:
+    """Aggregates request timings per (view, method) pair."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Start from zero; only meaningful for the in-process counters used in tests."""
+        self._registry = CollectorRegistry()
+        p, labels = METRIC_PREFIX, ['view', 'method']
+        self.requests = Counter(
+            f'{p}_http_requests_total', 'Requests handled, by view, method and status code.',
+            [*labels, 'status'], registry=self._registry,
+        )
+        self.duration = Histogram(
+            f'{p}_http_request_duration_seconds', 'Total request handling time.',
+            labels, buckets=DURATION_BUCKETS, registry=self._registry,
+        )
+        self.db_queries = Counter(
+            f'{p}_db_queries_total', 'SQL queries issued while handling requests.', labels, registry=self._registry,
+        )
+        self.db_time = Counter(
+            f'{p}_db_query_duration_seconds_total', 'Time spent waiting on SQL queries.', labels, registry=self._registry,
+        )
+        self.encode_time = Counter(
+            f'{p}_response_encode_seconds_total', 'Time spent encoding response data after the view returned.',
+            labels, registry=self._registry,
+        )
+
+    def observe(self, view, method, status, duration, db_queries=0, db_time=0.0, encode_time=0.0):
+        self.requests.labels(view, method, str(status)).inc()
+        self.duration.labels(view, method).observe(duration)
+        self.db_queries.labels(view, method).inc(db_queries)
+        self.db_time.labels(view, method).inc(db_time)
+        self.encode_time.labels(view, method).inc(encode_time)
+
+    def render(self):
+        """Render the collected metrics in the Prometheus text exposition format."""
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = self._registry
+        return generate_latest(registry)
+
+
+registry = MetricsRegistry()
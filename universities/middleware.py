@@ -0,0 +1,247 @@
+import cProfile
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.cache import cache
+from django.db import connection
+from django.utils.cache import patch_vary_headers
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import compression, profiling
+from .metrics import QueryRecorder, registry
+
+
+class RequestMetricsMiddleware:
+    """
+    Records database query count, database time, response encoding time and
+    total time for every request. The numbers are added to the response as a
+    `Server-Timing` header and aggregated into the `/metrics` registry.
+
+    Encoding covers only the renderer turning `response.data` into bytes
+    after the view returns. Serializers build `.data` inside the view, so
+    their cost, including any N+1 queries, shows up under `app` and `db`.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'SERVER_TIMING_HEADER', True)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        encode = getattr(request, '_metrics_encode_time', 0.0)
+        match = request.resolver_match
+        view = match.view_name if match else '<unresolved>'
+        registry.observe(view, request.method, response.status_code, total, recorder.count, recorder.duration, encode)
+
+        if self.server_timing:
+            app = max(total - recorder.duration - encode, 0.0)
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.count} queries", '
+                f'app;dur={app * 1000:.2f}, '
+                f'encode;dur={encode * 1000:.2f}, '
+                f'total;dur={total * 1000:.2f}'
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook runs, so the
+        # post-render callback measures the renderer only.
+        encode_start = time.perf_counter()
+
+        def record_encode_time(rendered):
+            request._metrics_encode_time = time.perf_counter() - encode_start
+
+        response.add_post_render_callback(record_encode_time)
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli/zstd/gzip compression of API responses above
+    API_COMPRESSION_MIN_SIZE bytes.
+
+    Views that serve from a cache can set `response.compression_cache_key`
+    to the key of the cached data; the compressed JSON body is then cached
+    next to it, so repeat hits skip compression as well as serialization.
+    Other renderings, such as the browsable API page, embed the requesting
+    user and are always compressed afresh.
+
+    Only paths under API_PATH_PREFIX are compressed. The API authenticates
+    with bearer tokens rather than cookies and does not echo CSRF tokens, so
+    no random padding is needed against BREACH; the admin pages do echo
+    them and are left uncompressed.
+    """
+    COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.api_prefix = settings.API_PATH_PREFIX
+        self.min_size = settings.API_COMPRESSION_MIN_SIZE
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not request.path_info.startswith(self.api_prefix):
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(self.COMPRESSIBLE_TYPES):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), response.streaming)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = self.compress_content(response, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def compress_content(self, response, encoding):
+        key = getattr(response, 'compression_cache_key', None)
+        renderer = getattr(response, 'accepted_renderer', None)
+        # Only the JSON rendering depends on the cached data alone.
+        if key is None or getattr(renderer, 'format', None) != 'json':
+            return compression.compress(encoding, response.content)
+        # `Accept: application/json; indent=4` renders the same data differently.
+        indent = renderer.get_indent(response.accepted_media_type, response.renderer_context or {})
+        variant_key = f'{key}:json:{indent or 0}:{encoding}'
+        compressed = cache.get(variant_key)
+        if compressed is None:
+            compressed = compression.compress(encoding, response.content)
+            cache.set(variant_key, compressed, timeout=settings.COMPRESSED_VARIANT_TIMEOUT)
+        return compressed
+
+
+class SiteMiddleware:
+    """
+    Runs the SITE_MIDDLEWARE chain (sessions, CSRF, auth, messages,
+    clickjacking) for everything except the API.
+
+    The API authenticates with JWT only, so requests under
+    API_PATH_PREFIX skip the chain entirely, while the admin keeps the full
+    cookie-based stack. Only the `process_view` hooks of the wrapped
+    middleware are supported, which is all the stock chain uses (CSRF).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.api_prefix = settings.API_PATH_PREFIX
+        self.view_hooks = []
+        handler = get_response
+        for path in reversed(settings.SITE_MIDDLEWARE):
+            try:
+                middleware = import_string(path)(handler)
+            except MiddlewareNotUsed:
+                continue
+            if hasattr(middleware, 'process_view'):
+                self.view_hooks.insert(0, middleware.process_view)
+            handler = middleware
+        self.site_handler = handler
+
+    def __call__(self, request):
+        if request.path_info.startswith(self.api_prefix):
+            return self.get_response(request)
+        return self.site_handler(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.path_info.startswith(self.api_prefix):
+            return None
+        for hook in self.view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+
+class ProfilingMiddleware:
+    """
+    Profiles single requests with cProfile and records their SQL (see
+    profiling.py). A request is profiled when it carries the PROFILING_HEADER
+    header or the `_profile` query parameter and a valid JWT for a staff
+    user, or at random with probability PROFILING_SAMPLE_RATE.
+
+    Not loaded at all unless PROFILING_ENABLED is set. Only the thread
+    serving the request is profiled, and a streaming body is not included.
+    Python allows one active cProfile per process, so while one request is
+    being profiled, others that ask for a profile are served without one.
+    """
+    QUERY_FLAG = '_profile'
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = 'HTTP_' + settings.PROFILING_HEADER.upper().replace('-', '_')
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.authentication = JWTAuthentication()
+
+    def __call__(self, request):
+        trigger = self.get_trigger(request)
+        if trigger is None or not profiling.profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profile(request, trigger)
+        finally:
+            profiling.profiler_lock.release()
+
+    def profile(self, request, trigger):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool, such as a debugger, is active.
+            return self.get_response(request)
+        recorder = QueryRecorder(record_sql=True)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(recorder):
+                response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        response['X-Profile-Id'] = profiling.save_profile(profiler, recorder.queries, {
+            'trigger': trigger,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'duration': round(duration, 6),
+        })
+        return response
+
+    def get_trigger(self, request):
+        if request.META.get(self.header) or self.QUERY_FLAG in request.GET:
+            return 'request' if self.is_staff(request) else None
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sample'
+        return None
+
+    def is_staff(self, request):
+        try:
+            result = self.authentication.authenticate(request)
+        except APIException:
+            return False
+        return result is not None and result[0].is_staff
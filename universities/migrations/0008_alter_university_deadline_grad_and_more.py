@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('universities', '0007_userdashboard_phone_number'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='university',
+            name='deadline_grad',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='university',
+            name='deadline_undergrad',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('universities', '0009_catalogchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UniversitySimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='universities.university')),
+                ('university', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='universities.university')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('university', 'rank'), name='unique_similarity_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:23
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+COUNTER_FIELDS = {
+    'favorites': 'favorites_count',
+    'planning_to_apply': 'planned_count',
+    'applied': 'applied_count',
+    'accepted': 'accepted_count',
+    'visa_approved': 'visa_approved_count',
+}
+
+
+def backfill_counters(apps, schema_editor):
+    University = apps.get_model('universities', 'University')
+    UserDashboard = apps.get_model('universities', 'UserDashboard')
+    updates = {}
+    for list_name, field in COUNTER_FIELDS.items():
+        through = getattr(UserDashboard, list_name).through
+        counts = (
+            through.objects.filter(university_id=OuterRef('pk'))
+            .order_by()
+            .values('university_id')
+            .annotate(count=Count('*'))
+            .values('count')
+        )
+        updates[field] = Coalesce(Subquery(counts), 0)
+    University.objects.update(**updates)
+    University.objects.update(popularity=F('favorites_count') + F('applied_count'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('universities', '0010_universitysimilarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='university',
+            name='accepted_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='university',
+            name='applied_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='university',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='university',
+            name='planned_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='university',
+            name='popularity',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='university',
+            name='visa_approved_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
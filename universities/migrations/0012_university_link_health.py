@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('universities', '0011_university_popularity_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='university',
+            name='application_link_status',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='university',
+            name='links_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='university',
+            name='links_ok',
+            field=models.BooleanField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='university',
+            name='university_link_status',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
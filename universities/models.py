@@ -12,18 +12,51 @@ class University(models.Model):
     course_offered = models.CharField(max_length=200, blank=True, default='')
     application_fee = models.DecimalField(max_digits=6, decimal_places=2)
     tuition_fee = models.DecimalField(max_digits=8, decimal_places=2)
-    deadline_undergrad = models.DateField(null=True, blank=True)
-    deadline_grad = models.DateField(null=True, blank=True)
+    deadline_undergrad = models.DateField(null=True, blank=True, db_index=True)
+    deadline_grad = models.DateField(null=True, blank=True, db_index=True)
     bachelor_programs = models.JSONField(default=list)
     masters_programs = models.JSONField(default=list)
     scholarships = models.JSONField(default=list)
     university_link = models.URLField()
     application_link = models.URLField()
     description = models.TextField(default="")
+    # Denormalized dashboard list counts, kept current by m2m_changed signals
+    # and corrected by the `reconcile_popularity` management command.
+    favorites_count = models.PositiveIntegerField(default=0)
+    planned_count = models.PositiveIntegerField(default=0)
+    applied_count = models.PositiveIntegerField(default=0)
+    accepted_count = models.PositiveIntegerField(default=0)
+    visa_approved_count = models.PositiveIntegerField(default=0)
+    # favorites_count + applied_count
+    popularity = models.PositiveIntegerField(default=0, db_index=True)
+    # Link health, written by the `check_links` management command. Statuses
+    # are the final HTTP status after redirects, 0 when there was no response.
+    university_link_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    application_link_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    links_ok = models.BooleanField(null=True, blank=True, db_index=True)
+    links_checked_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return self.name
 
+class CatalogChange(models.Model):
+    """
+    Append-only log of catalog writes. The id of the latest entry is the
+    catalog export version; clients sync by requesting changes after the
+    version they last saw.
+    """
+    ACTION_CHOICES = [
+        ('upsert', 'Created or updated'),
+        ('delete', 'Deleted'),
+    ]
+    # Not a foreign key: the log must outlive deleted universities.
+    university_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.action} university {self.university_id} (version {self.id})"
+
 class UserDashboard(models.Model):
     SUBSCRIPTION_CHOICES = [
         ('none', 'None'),
@@ -45,6 +78,57 @@ class UserDashboard(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Dashboard"
 
+class UniversitySimilarity(models.Model):
+    """
+    Precomputed top-K neighbours of a university based on which universities
+    users keep on their dashboards together. Rebuilt by the
+    `refresh_recommendations` management command.
+    """
+    university = models.ForeignKey(University, on_delete=models.CASCADE, related_name='similarities')
+    similar = models.ForeignKey(University, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['university', 'rank'], name='unique_similarity_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.university_id} ~ {self.similar_id} ({self.score:.3f})"
+
+class ReminderLog(models.Model):
+    """
+    One row per reminder sent on a channel, so each deadline or subscription
+    expiry is announced at most once per channel (see reminders.py).
+    """
+    KIND_CHOICES = [
+        ('deadline', 'Application deadline'),
+        ('subscription', 'Subscription expiry'),
+    ]
+    CHANNEL_CHOICES = [
+        ('email', 'Email'),
+        ('sms', 'SMS'),
+    ]
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reminders')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Not a foreign key: 0 for subscription reminders, so the unique
+    # constraint also covers them (NULLs never collide).
+    university_id = models.BigIntegerField(default=0)
+    due_date = models.DateField()
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'kind', 'university_id', 'due_date', 'channel'], name='unique_reminder_per_channel',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} reminder for user {self.user_id} due {self.due_date} ({self.channel})"
+
 @receiver(post_save, sender=User)
 def create_user_dashboard(sender, instance, created, **kwargs):
     """
@@ -0,0 +1,58 @@
+"""
+Denormalized popularity counters on University.
+
+Each dashboard list has a counter column; `popularity` is the number of
+users who favorited or applied to a university. Counters are adjusted with
+single UPDATE statements from m2m_changed signals (see signals.py). Writes
+that bypass the signals, such as raw SQL or deleting dashboards, are
+repaired by `reconcile_counters()`.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import University, UserDashboard
+
+COUNTER_FIELDS = {
+    'favorites': 'favorites_count',
+    'planning_to_apply': 'planned_count',
+    'applied': 'applied_count',
+    'accepted': 'accepted_count',
+    'visa_approved': 'visa_approved_count',
+}
+
+POPULARITY_LISTS = {'favorites', 'applied'}
+
+
+def adjust_counters(list_name, university_ids, delta):
+    """Add `delta` to the list counter (and popularity) of each university in `university_ids`."""
+    field = COUNTER_FIELDS[list_name]
+    updates = {field: Greatest(F(field) + delta, Value(0))}
+    if list_name in POPULARITY_LISTS:
+        updates['popularity'] = Greatest(F('popularity') + delta, Value(0))
+    University.objects.filter(pk__in=university_ids).update(**updates)
+
+
+def reconcile_counters():
+    """Recompute every counter from the list tables in one UPDATE. Returns the number of universities."""
+    counts = {}
+    for list_name, field in COUNTER_FIELDS.items():
+        through = getattr(UserDashboard, list_name).through
+        memberships = (
+            through.objects.filter(university_id=OuterRef('pk'))
+            .order_by()
+            .values('university_id')
+            .annotate(count=Count('*'))
+            .values('count')
+        )
+        counts[list_name] = Coalesce(Subquery(memberships), 0)
+    updates = {COUNTER_FIELDS[list_name]: count for list_name, count in counts.items()}
+    # Popularity is summed from the same subqueries rather than the counter
+    # columns, which an UPDATE would read before it sets them.
+    updates['popularity'] = sum((counts[name] for name in sorted(POPULARITY_LISTS)), Value(0))
+    return University.objects.update(**updates)
+
+
+def funnel_totals():
+    """Total list memberships per funnel stage, read from the counter columns."""
+    totals = University.objects.aggregate(**{list_name: Sum(field) for list_name, field in COUNTER_FIELDS.items()})
+    return {list_name: total or 0 for list_name, total in totals.items()}
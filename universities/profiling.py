@@ -0,0 +1,103 @@
+"""
+On-demand profiles of single requests.
+
+ProfilingMiddleware (see middleware.py) profiles a request with cProfile
+and records its SQL when a staff user asks for it, or at random with
+PROFILING_SAMPLE_RATE. Each profile is stored as two files in
+PROFILING_ROOT: `<id>.prof`, a pstats dump for snakeviz or
+`python -m pstats`, and `<id>.json` with the request, the SQL queries and
+the slowest functions. Only the newest PROFILING_KEEP profiles are kept.
+"""
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+PROFILE_ID_RE = re.compile(r'^\d{8}T\d{12}-[0-9a-f]{8}$')
+SUMMARY_LINES = 40
+
+# Held while a request is profiled; only one cProfile can be active per process.
+profiler_lock = threading.Lock()
+
+
+def profile_root():
+    return Path(settings.PROFILING_ROOT)
+
+
+def profile_path(profile_id, suffix):
+    """Return the path of a stored profile file, or None for a malformed id."""
+    if not PROFILE_ID_RE.match(profile_id):
+        return None
+    return profile_root() / f'{profile_id}{suffix}'
+
+
+def _summary(profiler):
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(SUMMARY_LINES)
+    return stream.getvalue()
+
+
+def save_profile(profiler, queries, meta):
+    """Store a finished profile with its SQL queries and request metadata; returns the profile id."""
+    now = timezone.now()
+    # Sorting ids sorts profiles by age.
+    profile_id = f'{now:%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}'
+    root = profile_root()
+    root.mkdir(parents=True, exist_ok=True)
+
+    profiler.dump_stats(root / f'{profile_id}.prof')
+    record = {
+        'id': profile_id,
+        'created_at': now.isoformat(),
+        **meta,
+        'query_count': len(queries),
+        'query_time': round(sum(query['time'] for query in queries), 6),
+        'queries': queries,
+        'summary': _summary(profiler),
+    }
+    # Written last and atomically: a profile is listed only once complete.
+    tmp_path = root / f'.{profile_id}.json.tmp'
+    tmp_path.write_text(json.dumps(record, default=str))
+    os.replace(tmp_path, root / f'{profile_id}.json')
+
+    prune_profiles(settings.PROFILING_KEEP)
+    return profile_id
+
+
+def prune_profiles(keep):
+    root = profile_root()
+    for path in sorted(root.glob('*.json'), reverse=True)[keep:]:
+        path.unlink(missing_ok=True)
+        path.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def list_profiles():
+    """Metadata of the stored profiles, newest first, without queries or summary."""
+    root = profile_root()
+    if not root.is_dir():
+        return []
+    profiles = []
+    for path in sorted(root.glob('*.json'), reverse=True):
+        try:
+            record = json.loads(path.read_text())
+        except (OSError, ValueError):
+            # Pruned by another worker while listing.
+            continue
+        record.pop('queries', None)
+        record.pop('summary', None)
+        profiles.append(record)
+    return profiles
+
+
+def load_profile(profile_id):
+    path = profile_path(profile_id, '.json')
+    if path is None or not path.is_file():
+        return None
+    return json.loads(path.read_text())
@@ -0,0 +1,125 @@
+"""
+Item-item recommendations from dashboard co-occurrence.
+
+Each user is a sparse vector over universities, weighted by how far along
+their dashboard lists a university got. Two universities are similar when
+the same users keep them; similarity is the cosine of their user vectors.
+Only non-zero entries are ever touched, so the cost is proportional to the
+sum of squared list sizes rather than universities x users.
+"""
+import heapq
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import University, UniversitySimilarity, UserDashboard
+
+# Stronger signals further down the application funnel.
+LIST_WEIGHTS = {
+    'favorites': 1.0,
+    'planning_to_apply': 2.0,
+    'applied': 3.0,
+    'accepted': 4.0,
+    'visa_approved': 4.0,
+}
+
+# Users with very long lists add little signal and quadratic cost; only their
+# strongest entries are used.
+MAX_ITEMS_PER_USER = 200
+
+
+def _through_tables():
+    return [(getattr(UserDashboard, name).through, weight) for name, weight in LIST_WEIGHTS.items()]
+
+
+def build_user_vectors():
+    """Return {dashboard_id: {university_id: weight}} from the five dashboard list tables."""
+    vectors = defaultdict(dict)
+    for through, weight in _through_tables():
+        rows = through.objects.values_list('userdashboard_id', 'university_id').iterator(chunk_size=5000)
+        for dashboard_id, university_id in rows:
+            vector = vectors[dashboard_id]
+            if weight > vector.get(university_id, 0.0):
+                vector[university_id] = weight
+    return vectors
+
+
+def compute_similarities(vectors, top_k):
+    """Return {university_id: [(similar_id, score), ...]} with the `top_k` best scores first."""
+    dot = defaultdict(lambda: defaultdict(float))
+    norms = defaultdict(float)
+    for vector in vectors.values():
+        items = vector.items()
+        if len(vector) > MAX_ITEMS_PER_USER:
+            items = heapq.nlargest(MAX_ITEMS_PER_USER, items, key=lambda item: (item[1], -item[0]))
+        items = list(items)
+        for a, weight_a in items:
+            norms[a] += weight_a * weight_a
+            row = dot[a]
+            for b, weight_b in items:
+                if a != b:
+                    row[b] += weight_a * weight_b
+
+    similarities = {}
+    for a, row in dot.items():
+        norm_a = math.sqrt(norms[a])
+        scores = ((b, value / (norm_a * math.sqrt(norms[b]))) for b, value in row.items())
+        similarities[a] = heapq.nlargest(top_k, scores, key=lambda item: (item[1], -item[0]))
+    return similarities
+
+
+def refresh_similarities(top_k=20):
+    """Recompute the top-K table. Readers keep seeing the previous table until the swap commits."""
+    similarities = compute_similarities(build_user_vectors(), top_k)
+    existing = set(University.objects.values_list('id', flat=True))
+    rows = [
+        UniversitySimilarity(university_id=a, similar_id=b, score=score, rank=rank)
+        for a, neighbours in similarities.items() if a in existing
+        for rank, (b, score) in enumerate((n for n in neighbours if n[0] in existing), start=1)
+    ]
+    with transaction.atomic():
+        UniversitySimilarity.objects.all().delete()
+        UniversitySimilarity.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+SIMILAR_FIELDS = {
+    'id': 'similar_id',
+    'name': 'similar__name',
+    'country': 'similar__country',
+    'city': 'similar__city',
+}
+OUTPUT_FIELDS = {**SIMILAR_FIELDS, 'score': 'score'}
+
+
+def _rename(rows):
+    return [{key: row[column] for key, column in OUTPUT_FIELDS.items()} for row in rows]
+
+
+def get_similar(university_id, limit):
+    rows = (
+        UniversitySimilarity.objects.filter(university_id=university_id)
+        .order_by('rank')
+        .values('score', *SIMILAR_FIELDS.values())[:limit]
+    )
+    return _rename(rows)
+
+
+def get_recommendations(user_id, limit):
+    """
+    Universities most similar to everything on the user's dashboard, excluding
+    the ones already there, in a single query over the precomputed table.
+    """
+    through_tables = [through for through, _ in _through_tables()]
+    seeds = [through.objects.filter(userdashboard__user_id=user_id).values('university_id') for through in through_tables]
+    seed_ids = seeds[0].union(*seeds[1:], all=True)
+    rows = (
+        UniversitySimilarity.objects.filter(university_id__in=seed_ids)
+        .exclude(similar_id__in=seed_ids)
+        .values(*SIMILAR_FIELDS.values())
+        .annotate(score=Sum('score'))
+        .order_by('-score', 'similar_id')[:limit]
+    )
+    return _rename(rows)
@@ -0,0 +1,158 @@
+"""
+Application deadline and subscription expiry reminders.
+
+Due reminders are found with one query per reminder type: deadlines of
+universities on a user's planning_to_apply list (undergraduate and graduate
+deadlines are separate types) and subscriptions about to end. Each query
+skips reminders that already have a ReminderLog row for the channel, so
+every reminder is sent at most once per channel.
+
+Users get one email and one SMS listing all their new reminders. Without an
+SMS_BACKEND no text messages are sent or logged, so the reminders still go
+out once a provider is configured. Messages
+go out in batches of REMINDER_BATCH_SIZE over a single email connection and
+a single SMS backend connection, pausing REMINDER_BATCH_INTERVAL seconds
+between batches to stay within provider rate limits. A batch is logged as
+soon as it is sent, so an interrupted run resumes where it stopped.
+"""
+import time
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import mail
+from django.db.models import Exists, OuterRef, Value
+from django.utils import timezone
+
+from . import sms
+from .models import ReminderLog, UserDashboard
+
+CHANNELS = ['email', 'sms']
+CHUNK_SIZE = 2000
+
+Recipient = namedtuple('Recipient', 'email first_name phone_number')
+Reminder = namedtuple('Reminder', 'kind university_id university_name due_date')
+
+
+def _sent_flags(kind, user, university, due_date):
+    """Exists() annotations telling whether a reminder was already sent on each channel."""
+    return {
+        f'{channel}_sent': Exists(ReminderLog.objects.filter(
+            user_id=OuterRef(user), kind=kind, university_id=university, due_date=OuterRef(due_date), channel=channel,
+        ))
+        for channel in CHANNELS
+    }
+
+
+def _deadline_rows(field, window):
+    due = f'university__{field}'
+    return (
+        UserDashboard.planning_to_apply.through.objects
+        .filter(**{f'{due}__range': window}, userdashboard__user__is_active=True)
+        .annotate(**_sent_flags('deadline', 'userdashboard__user_id', OuterRef('university_id'), due))
+        .values_list(
+            'userdashboard__user_id', 'userdashboard__user__email', 'userdashboard__user__first_name',
+            'userdashboard__phone_number', Value('deadline'), 'university_id', 'university__name', due,
+            *(f'{channel}_sent' for channel in CHANNELS),
+        )
+    )
+
+
+def _subscription_rows(window):
+    return (
+        UserDashboard.objects
+        .filter(subscription_status='active', subscription_end_date__range=window, user__is_active=True)
+        .annotate(**_sent_flags('subscription', 'user_id', 0, 'subscription_end_date'))
+        .values_list(
+            'user_id', 'user__email', 'user__first_name', 'phone_number', Value('subscription'), Value(0), Value(''),
+            'subscription_end_date', *(f'{channel}_sent' for channel in CHANNELS),
+        )
+    )
+
+
+def find_due_reminders(today, deadline_days, subscription_days):
+    """
+    Return (recipients, pending): recipients maps user ids to Recipient, and
+    pending maps each channel to {user_id: [Reminder, ...]} of reminders not
+    yet sent on it. Users without an email address or phone number are
+    skipped for that channel.
+    """
+    deadline_window = (today, today + timedelta(days=deadline_days))
+    queries = [
+        _deadline_rows('deadline_undergrad', deadline_window),
+        _deadline_rows('deadline_grad', deadline_window),
+        _subscription_rows((today, today + timedelta(days=subscription_days))),
+    ]
+    recipients = {}
+    pending = {channel: defaultdict(list) for channel in CHANNELS}
+    for query in queries:
+        for user_id, email, first_name, phone_number, *reminder, email_sent, sms_sent in query.iterator(chunk_size=CHUNK_SIZE):
+            recipients[user_id] = Recipient(email, first_name, phone_number)
+            reminder = Reminder(*reminder)
+            if email and not email_sent and reminder not in pending['email'][user_id]:
+                pending['email'][user_id].append(reminder)
+            if phone_number and not sms_sent and reminder not in pending['sms'][user_id]:
+                pending['sms'][user_id].append(reminder)
+    return recipients, pending
+
+
+def _describe(reminder):
+    if reminder.kind == 'subscription':
+        return f'Your UNI-FINDER subscription ends on {reminder.due_date:%d %B %Y}.'
+    return f'The application deadline for {reminder.university_name} is {reminder.due_date:%d %B %Y}.'
+
+
+def build_email(recipient, reminders):
+    lines = '\n'.join(f'- {_describe(reminder)}' for reminder in sorted(reminders, key=lambda r: r.due_date))
+    return mail.EmailMessage(
+        subject='Upcoming deadlines on UNI-FINDER',
+        body=f'Hi {recipient.first_name or "there"},\n\nJust a reminder:\n\n{lines}\n\nThe UNI-FINDER team',
+        to=[recipient.email],
+    )
+
+
+def build_sms(recipient, reminders):
+    first = min(reminders, key=lambda reminder: reminder.due_date)
+    more = f' (+{len(reminders) - 1} more on your dashboard)' if len(reminders) > 1 else ''
+    return sms.SMSMessage(recipient.phone_number, f'UNI-FINDER: {_describe(first)}{more}')
+
+
+def _dispatch(channel, connection, build, recipients, pending, batch_size, batch_interval):
+    """Send `pending` reminders in throttled batches over `connection`, logging each batch once sent."""
+    user_ids = sorted(pending)
+    with connection:
+        for start in range(0, len(user_ids), batch_size):
+            if start:
+                time.sleep(batch_interval)
+            batch = user_ids[start:start + batch_size]
+            connection.send_messages([build(recipients[user_id], pending[user_id]) for user_id in batch])
+            ReminderLog.objects.bulk_create([
+                ReminderLog(
+                    user_id=user_id, kind=reminder.kind, university_id=reminder.university_id,
+                    due_date=reminder.due_date, channel=channel,
+                )
+                for user_id in batch
+                for reminder in pending[user_id]
+            ], ignore_conflicts=True)
+    return len(user_ids)
+
+
+def send_reminders(today=None, deadline_days=None, subscription_days=None, batch_size=None, batch_interval=None):
+    """Send every due reminder. Returns the number of messages sent per channel."""
+    today = today or timezone.now().date()
+    recipients, pending = find_due_reminders(
+        today,
+        settings.REMINDER_DEADLINE_DAYS if deadline_days is None else deadline_days,
+        settings.REMINDER_SUBSCRIPTION_DAYS if subscription_days is None else subscription_days,
+    )
+    batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+    batch_interval = settings.REMINDER_BATCH_INTERVAL if batch_interval is None else batch_interval
+    connections = {'email': mail.get_connection, 'sms': sms.get_connection}
+    builders = {'email': build_email, 'sms': build_sms}
+    enabled = {'email': True, 'sms': bool(settings.SMS_BACKEND)}
+    return {
+        channel: _dispatch(
+            channel, connections[channel](), builders[channel], recipients, pending[channel], batch_size, batch_interval,
+        ) if enabled[channel] and pending[channel] else 0
+        for channel in CHANNELS
+    }
@@ -102,10 +102,67 @@ class UserDetailSerializer(serializers.ModelSerializer):
 
         return instance
 
+# Popularity counters and link health are updated in bulk, without logging
+# a CatalogChange, so versioned catalog exports leave them out.
+BULK_UPDATED_UNIVERSITY_FIELDS = [
+    'favorites_count', 'planned_count', 'applied_count', 'accepted_count',
+    'visa_approved_count', 'popularity',
+    'university_link_status', 'application_link_status', 'links_ok', 'links_checked_at',
+]
+
 class UniversitySerializer(serializers.ModelSerializer):
     class Meta:
         model = University
         fields = '__all__'
+        read_only_fields = BULK_UPDATED_UNIVERSITY_FIELDS
+
+class CatalogExportSerializer(serializers.ModelSerializer):
+    """A university as it appears in catalog snapshots and change feeds."""
+    class Meta:
+        model = University
+        exclude = BULK_UPDATED_UNIVERSITY_FIELDS
+
+class UniversityRowEncoder:
+    """
+    Fast read path producing the same output as UniversitySerializer from
+    `values_list()` tuples instead of model instances. Only fields whose
+    database value differs from its JSON representation (decimals, datetimes)
+    go through the serializer field; everything else is passed straight to
+    the renderer.
+    """
+    # Field types whose to_representation() returns the database value as is.
+    PASSTHROUGH_FIELDS = (
+        serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+        serializers.FloatField, serializers.JSONField,
+    )
+
+    def __init__(self, serializer_class=UniversitySerializer):
+        fields = serializer_class().fields
+        self.names = list(fields)
+        self.columns = []
+        self.converters = []
+        for index, (name, field) in enumerate(fields.items()):
+            if '.' in field.source or field.source == '*':
+                raise ValueError(f'{serializer_class.__name__}.{name} is not a plain model column')
+            self.columns.append(field.source)
+            if not isinstance(field, self.PASSTHROUGH_FIELDS):
+                self.converters.append((index, field.to_representation))
+
+    def rows(self, queryset):
+        """Return a queryset of raw value tuples for `encode()`."""
+        return queryset.values_list(*self.columns)
+
+    def encode(self, rows):
+        names, converters = self.names, self.converters
+        data = []
+        for row in rows:
+            if converters:
+                row = list(row)
+                for index, to_representation in converters:
+                    if row[index] is not None:
+                        row[index] = to_representation(row[index])
+            data.append(dict(zip(names, row)))
+        return data
 
 class DashboardUniversitySerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,110 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import bump_catalog_version
+from .dashboards import bump_dashboard_versions
+from .models import CatalogChange, University, UserDashboard
+from .popularity import adjust_counters
+
+DASHBOARD_LISTS = ['favorites', 'planning_to_apply', 'applied', 'accepted', 'visa_approved']
+
+
+@receiver(post_save, sender=University)
+@receiver(post_delete, sender=University)
+def invalidate_catalog_caches(sender, instance, **kwargs):
+    """
+    Any change to a university invalidates cached catalog aggregations.
+    Note that QuerySet.update() and bulk_create() do not send these signals.
+    """
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=University)
+def log_catalog_upsert(sender, instance, **kwargs):
+    CatalogChange.objects.create(university_id=instance.pk, action='upsert')
+
+
+@receiver(post_delete, sender=University)
+def log_catalog_delete(sender, instance, **kwargs):
+    CatalogChange.objects.create(university_id=instance.pk, action='delete')
+
+
+def bump_dashboards_on_commit(user_ids):
+    """
+    Bump dashboard versions once the current transaction commits. Bumping
+    before the commit would let a concurrent request cache the old rows under
+    the new version, where they would stay until the next change.
+    """
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: bump_dashboard_versions(user_ids))
+
+
+@receiver(post_save, sender=UserDashboard)
+def invalidate_dashboard(sender, instance, **kwargs):
+    """Subscription and phone number changes, e.g. from the payment webhook."""
+    bump_dashboards_on_commit([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+def invalidate_dashboard_owner(sender, instance, created, update_fields=None, **kwargs):
+    """The dashboard shows the user's name; logins only touch last_login."""
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    bump_dashboards_on_commit([instance.pk])
+
+
+def invalidate_dashboard_lists(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Invalidate the cached dashboards of every user whose lists changed."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            bump_dashboards_on_commit([instance.user_id])
+    elif action == 'pre_clear':
+        # Changed from the University side; the rows are gone by post_clear,
+        # so collect their users first.
+        bump_dashboards_on_commit(sender.objects.filter(university=instance).values_list('userdashboard__user_id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        # Changed from the University side: `pk_set` holds dashboard ids.
+        bump_dashboards_on_commit(UserDashboard.objects.filter(pk__in=pk_set).values_list('user_id', flat=True))
+
+
+def popularity_counter_updater(list_name):
+    """Build an m2m_changed receiver keeping the counter for `list_name` in step with its table."""
+    def update_popularity_counters(sender, instance, action, reverse, pk_set, **kwargs):
+        if action == 'post_add':
+            # add() leaves ids that were already linked out of `pk_set`.
+            if reverse:
+                # Changed from the University side: `pk_set` holds dashboard ids.
+                adjust_counters(list_name, [instance.pk], len(pk_set))
+            else:
+                adjust_counters(list_name, pk_set, 1)
+        elif action == 'pre_remove':
+            # remove() passes every requested id, so count only the linked ones.
+            if reverse:
+                removed = sender.objects.filter(university=instance, userdashboard__in=pk_set).count()
+                if removed:
+                    adjust_counters(list_name, [instance.pk], -removed)
+            else:
+                adjust_counters(list_name, list(sender.objects.filter(userdashboard=instance, university__in=pk_set).values_list('university_id', flat=True)), -1)
+        elif action == 'pre_clear':
+            if reverse:
+                adjust_counters(list_name, [instance.pk], -sender.objects.filter(university=instance).count())
+            else:
+                adjust_counters(list_name, list(sender.objects.filter(userdashboard=instance).values_list('university_id', flat=True)), -1)
+    return update_popularity_counters
+
+
+for list_name in DASHBOARD_LISTS:
+    through = getattr(UserDashboard, list_name).through
+    m2m_changed.connect(
+        invalidate_dashboard_lists,
+        sender=through,
+        dispatch_uid=f'invalidate_dashboard_{list_name}',
+    )
+    m2m_changed.connect(
+        popularity_counter_updater(list_name),
+        sender=through,
+        weak=False,
+        dispatch_uid=f'popularity_counters_{list_name}',
+    )
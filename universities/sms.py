@@ -0,0 +1,67 @@
+"""
+Pluggable SMS sending, modelled on Django's email backends.
+
+SMS_BACKEND names the backend class; it is empty until a provider is
+configured, and SMS reminders are skipped meanwhile. Backends are used as
+context managers so a provider session is opened once for a whole batch
+run, and send_messages() takes a list of SMSMessage and returns how many
+were sent.
+"""
+import sys
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+SMSMessage = namedtuple('SMSMessage', 'to body')
+
+# Messages sent through LocmemBackend, for tests.
+outbox = []
+
+
+class BaseSMSBackend:
+    def __init__(self, fail_silently=False, **kwargs):
+        self.fail_silently = fail_silently
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def send_messages(self, messages):
+        raise NotImplementedError('subclasses of BaseSMSBackend must override send_messages()')
+
+
+class ConsoleBackend(BaseSMSBackend):
+    """Writes messages to stdout, for local development."""
+
+    def __init__(self, stream=None, **kwargs):
+        super().__init__(**kwargs)
+        self.stream = stream or sys.stdout
+        self._lock = threading.RLock()
+
+    def send_messages(self, messages):
+        with self._lock:
+            for message in messages:
+                self.stream.write(f'SMS to {message.to}: {message.body}\n')
+            self.stream.flush()
+        return len(messages)
+
+
+class LocmemBackend(BaseSMSBackend):
+    def send_messages(self, messages):
+        outbox.extend(messages)
+        return len(messages)
+
+
+def get_connection(backend=None, **kwargs):
+    return import_string(backend or settings.SMS_BACKEND)(**kwargs)
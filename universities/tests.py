@@ -1,3 +1,1132 @@
-from django.test import TestCase
+import csv
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group, User, update_last_login
+from django.core.cache import cache
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ModelSerializer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import sms, urls as university_urls
+from .exports import get_changes, write_snapshot
+from .autocomplete import get_index
+from .linkcheck import check_university_links, check_urls, fetch_status
+from .metrics import registry as metrics_registry
+from .models import ReminderLog, University, UserDashboard
+from .popularity import reconcile_counters
+from .profiling import list_profiles, profiler_lock
+from .recommendations import refresh_similarities
+from .reminders import send_reminders
+from .throttling import ScopedTokenBucketThrottle
+from .warmup import STEPS as WARM_UP_STEPS, prime_serializers, warm_up
+from .serializers import UniversitySerializer, UserDetailSerializer, UserSerializer
+
+DASHBOARD_LISTS = ['favorites', 'planning_to_apply', 'applied', 'accepted', 'visa_approved']
+
+
+# Tests clear the cache freely, so they never run against a configured Redis.
+local_cache = override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'universities-tests',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+})
+
+
+def setUpModule():
+    local_cache.enable()
+
+
+def tearDownModule():
+    local_cache.disable()
+
+
+def seed_universities(count, start=0):
+    """Create `count` universities with realistically sized program and scholarship lists."""
+    countries = ['Germany', 'Canada', 'Japan', 'Netherlands', 'Australia']
+    universities = [
+        University(
+            name=f'University {i}',
+            country=countries[i % len(countries)],
+            city=f'City {i % 7}',
+            course_offered=['Computer Science', 'Medicine', 'Law', 'Economics'][i % 4],
+            application_fee=Decimal('50.00') + i % 40,
+            tuition_fee=Decimal('12000.00') + 250 * (i % 30),
+            deadline_undergrad=date(2026, 1, 15) + timedelta(days=i % 120),
+            deadline_grad=date(2026, 3, 1) + timedelta(days=i % 90),
+            bachelor_programs=[f'BSc Program {n}' for n in range(8)],
+            masters_programs=[f'MSc Program {n}' for n in range(6)],
+            scholarships=[{'name': f'Scholarship {n}', 'amount': 1000 * n} for n in range(3)],
+            university_link=f'https://university-{i}.example.edu',
+            application_link=f'https://university-{i}.example.edu/apply',
+            description='A research university. ' * 20,
+        )
+        for i in range(start, start + count)
+    ]
+    return University.objects.bulk_create(universities)
+
+
+def seed_users(count, universities, start=0):
+    """Create subscribed users whose dashboard lists reference `universities`."""
+    user_group, _ = Group.objects.get_or_create(name='user')
+    users = []
+    for i in range(start, start + count):
+        user = User.objects.create_user(
+            username=f'student{i}', email=f'student{i}@example.com', password='pass',
+            first_name='Student', last_name=str(i),
+        )
+        user.groups.add(user_group)
+        dashboard = user.dashboard
+        dashboard.subscription_status = 'active'
+        dashboard.subscription_end_date = date.today() + timedelta(days=30)
+        dashboard.phone_number = f'+2519000{i:05d}'
+        dashboard.save()
+        for offset, list_name in enumerate(DASHBOARD_LISTS):
+            getattr(dashboard, list_name).add(*universities[offset:offset + 5])
+        users.append(user)
+    return users
+
+
+def university_payload(name='New University'):
+    return {
+        'name': name,
+        'country': 'Germany',
+        'city': 'Berlin',
+        'course_offered': 'Computer Science',
+        'application_fee': '75.00',
+        'tuition_fee': '15000.00',
+        'deadline_undergrad': '2026-01-15',
+        'deadline_grad': '2026-03-01',
+        'bachelor_programs': ['BSc Informatics'],
+        'masters_programs': ['MSc Informatics'],
+        'scholarships': [],
+        'university_link': 'https://new.example.edu',
+        'application_link': 'https://new.example.edu/apply',
+        'description': 'Newly added.',
+    }
+
+
+class TemporaryExportRootMixin:
+    """Write catalog snapshots to a throwaway directory."""
+    @classmethod
+    def setUpClass(cls):
+        export_root = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(CATALOG_EXPORT_ROOT=export_root))
+        super().setUpClass()
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics_registry.reset()
+        self.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+
+    def test_server_timing_header(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get(reverse('group-list'))
+        timings = dict(entry.split(';', 1) for entry in response['Server-Timing'].split(', '))
+        self.assertEqual(list(timings), ['db', 'app', 'encode', 'total'])
+        self.assertRegex(timings['db'], r'^dur=[\d.]+;desc="1 queries"$')
+
+    def test_metrics_are_exported_to_staff(self):
+        client = Client()
+        client.get('/admin/login/')
+        self.assertEqual(client.get('/metrics').status_code, 403)
+
+        client.force_login(self.admin)
+        body = client.get('/metrics').content.decode()
+        self.assertIn('unifinder_http_requests_total{method="GET",status="200",view="admin:login"} 1.0', body)
+        self.assertIn('unifinder_db_queries_total{method="GET",view="metrics"}', body)
+
+    def test_metrics_of_all_workers_are_reported(self):
+        observe = "from universities.metrics import registry; registry.observe('group-list', 'GET', 200, 0.01, 1)"
+        render = "from universities.metrics import registry; print(registry.render().decode())"
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': metrics_dir}
+            for code in (observe, observe, render):
+                result = subprocess.run(
+                    [sys.executable, '-c', code], env=env, cwd=settings.BASE_DIR,
+                    capture_output=True, text=True, check=True,
+                )
+        self.assertIn('unifinder_http_requests_total{method="GET",status="200",view="group-list"} 2.0', result.stdout)
+        self.assertIn('unifinder_db_queries_total{method="GET",view="group-list"} 2.0', result.stdout)
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_scrapers_authenticate_with_the_token(self):
+        client = Client()
+        client.force_login(self.admin)
+        self.assertEqual(client.get('/metrics').status_code, 401)
+        self.assertEqual(client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token').status_code, 200)
+
+
+def url_names(patterns):
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= url_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+class QueryBudgetTests(TemporaryExportRootMixin, TestCase):
+    """
+    Every named route in universities/urls.py declares the maximum number of SQL
+    queries a request may issue. Authentication is forced on the client, so the
+    budgets cover permission checks, the view and serialization only.
+    """
+
+    # (url name, method) -> (client role, maximum queries)
+    BUDGETS = {
+        ('api-root', 'get'): ('admin', 0),
+        ('user-list', 'get'): ('admin', 3),
+        ('user-detail', 'get'): ('admin', 3),
+        ('user-export', 'get'): ('admin', 2),
+        ('dashboard', 'get'): ('student', 7),
+        ('dashboard', 'post'): ('student', 11),
+        ('dashboard', 'patch'): ('student', 7),
+        ('dashboard-deadlines', 'get'): ('student', 1),
+        ('dashboard-recommendations', 'get'): ('student', 2),
+        ('group-list', 'get'): ('admin', 1),
+        ('initialize_chapa_payment', 'post'): ('student', 0),
+        ('admin-stats', 'get'): ('admin', 8),
+        ('profile-list', 'get'): ('admin', 0),
+        ('profile-detail', 'get'): ('admin', 0),
+        ('profile-download', 'get'): ('admin', 0),
+        ('university-list', 'get'): ('student', 3),
+        ('university-facets', 'get'): ('student', 5),
+        ('university-autocomplete', 'get'): ('student', 2),
+        ('catalog-snapshot', 'get'): ('student', 4),
+        ('catalog-snapshot-version', 'get'): ('student', 2),
+        ('catalog-changes', 'get'): ('student', 4),
+        ('create_university', 'post'): ('admin', 2),
+        ('university-bulk-create', 'post'): ('admin', 4),
+        ('university_detail', 'get'): ('student', 2),
+        ('university-similar', 'get'): ('student', 3),
+        ('update_university', 'put'): ('admin', 3),
+        ('delete_university', 'delete'): ('admin', 9),
+    }
+
+    # Endpoints whose query count must not grow with the number of rows returned.
+    LIST_ENDPOINTS = ['user-list', 'user-export', 'dashboard', 'group-list', 'admin-stats', 'university-list']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.universities = seed_universities(30)
+        cls.students = seed_users(5, cls.universities)
+        cls.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def request(self, name, method='get', query=None):
+        role, _ = self.BUDGETS[name, method]
+        user = User.objects.get(pk=(self.admin if role == 'admin' else self.students[0]).pk)
+        self.client.force_authenticate(user)
+
+        kwargs = {}
+        if name in ('user-detail',):
+            kwargs['pk'] = self.students[1].pk
+        elif name in ('university_detail', 'university-similar', 'update_university', 'delete_university'):
+            kwargs['pk'] = self.universities[-1].pk
+        elif name == 'catalog-snapshot-version':
+            kwargs['version'] = 0
+        elif name in ('profile-detail', 'profile-download'):
+            kwargs['profile_id'] = '20260101T000000000000-0000abcd'
+        url = reverse(name, kwargs=kwargs)
+        if name == 'catalog-changes':
+            query = {'since': 0}
+        elif name == 'university-autocomplete':
+            query = {'q': 'uni'}
+
+        data, fmt = None, 'json'
+        if name == 'dashboard' and method == 'post':
+            data = {'university_id': self.universities[10].pk, 'list_name': 'favorites'}
+        elif name == 'dashboard' and method == 'patch':
+            data = {'first_name': 'Ada'}
+        elif name in ('create_university', 'update_university'):
+            data = university_payload()
+        elif name == 'university-bulk-create':
+            body = json.dumps([university_payload('Bulk A'), university_payload('Bulk B')]).encode()
+            upload = SimpleUploadedFile('universities.json', body, content_type='application/json')
+            data, fmt = {'file': upload}, 'multipart'
+
+        with CaptureQueriesContext(connection) as queries:
+            if method == 'get':
+                response = self.client.get(url, query)
+            else:
+                response = getattr(self.client, method)(url, data, format=fmt)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 500, f'{method.upper()} {name} failed with {response.status_code}')
+        return len(queries), queries
+
+    def test_every_route_declares_a_budget(self):
+        missing = url_names(university_urls.urlpatterns) - {name for name, _ in self.BUDGETS}
+        self.assertFalse(missing, f'Routes without a query budget: {sorted(missing)}')
+
+    @mock.patch('requests.post')
+    def test_routes_stay_within_budget(self, chapa_post):
+        chapa_post.return_value.json.return_value = {'status': 'success', 'data': {'checkout_url': 'https://chapa.test'}}
+        for (name, method), (_, budget) in self.BUDGETS.items():
+            with self.subTest(route=name, method=method):
+                count, queries = self.request(name, method)
+                self.assertLessEqual(
+                    count, budget,
+                    f'{method.upper()} {name} issued {count} queries (budget {budget}):\n'
+                    + '\n'.join(q['sql'] for q in queries.captured_queries),
+                )
+
+    def test_list_queries_do_not_scale_with_rows(self):
+        before = {name: self.request(name)[0] for name in self.LIST_ENDPOINTS}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            more = seed_universities(40, start=100)
+            seed_users(10, more, start=100)
+            for list_name in DASHBOARD_LISTS:
+                getattr(self.students[0].dashboard, list_name).add(*more[:20])
+        Group.objects.bulk_create([Group(name=f'group {i}') for i in range(10)])
+
+        for name in self.LIST_ENDPOINTS:
+            with self.subTest(route=name):
+                self.assertEqual(self.request(name)[0], before[name])
+
+    def test_university_page_size_does_not_change_query_count(self):
+        small, _ = self.request('university-list', query={'page_size': 5})
+        large, _ = self.request('university-list', query={'page_size': 100})
+        self.assertEqual(small, large)
+
+
+class UniversityFacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.universities = seed_universities(20)
+        cls.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('university-facets')
+
+    def test_counts_follow_the_list_filters(self):
+        response = self.client.get(self.url, {'country__icontains': 'germany'})
+        self.assertEqual(response.status_code, 200)
+        facets = response.data
+        self.assertEqual(facets['total'], 4)
+        self.assertEqual(facets['country'], [{'value': 'Germany', 'count': 4}])
+        self.assertEqual(sum(b['count'] for b in facets['application_fee']), 4)
+        self.assertEqual(sum(b['count'] for b in facets['tuition_fee']), 4)
+
+    def test_cached_until_a_university_changes(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.data['total'], 20)
+
+        University.objects.create(**{**university_payload(), 'application_fee': '10.00'})
+        fresh = self.client.get(self.url)
+        self.assertEqual(fresh.data['total'], 21)
+        self.assertEqual(fresh.data['application_fee'][0], {'min': 0, 'max': 25, 'count': 1})
+
+
+class UpcomingDeadlineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+        cls.soon, cls.later, cls.other = University.objects.bulk_create([
+            University(**{**university_payload('Soon'), 'deadline_undergrad': today + timedelta(days=3), 'deadline_grad': None}),
+            University(**{**university_payload('Later'), 'deadline_undergrad': today + timedelta(days=200), 'deadline_grad': today + timedelta(days=10)}),
+            University(**{**university_payload('Other'), 'deadline_undergrad': today + timedelta(days=1), 'deadline_grad': None}),
+        ])
+        cls.user = User.objects.create_user(username='student', password='pass')
+        cls.user.dashboard.planning_to_apply.add(cls.later)
+        cls.user.dashboard.favorites.add(cls.soon, cls.later)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_feed_lists_soonest_deadlines_first(self):
+        response = self.client.get(reverse('dashboard-deadlines'), {'days': 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['name'] for item in response.data], ['Soon', 'Later'])
+        self.assertEqual(response.data[1]['next_deadline'], date.today() + timedelta(days=10))
+        self.assertEqual(response.data[1]['lists'], ['favorites', 'planning_to_apply'])
+
+    def test_feed_is_cached_until_the_dashboard_changes(self):
+        url = reverse('dashboard-deadlines')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.dashboard.planning_to_apply.add(self.other)
+        self.assertEqual([item['name'] for item in self.client.get(url).data], ['Other', 'Soon', 'Later'])
+
+    def test_catalog_can_be_filtered_and_ordered_by_deadline(self):
+        admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        self.client.force_authenticate(admin)
+        response = self.client.get(reverse('university-list'), {'deadline_within': 7, 'ordering': 'deadline_undergrad'})
+        self.assertEqual([u['name'] for u in response.data['results']], ['Other', 'Soon'])
+
+        for name in ('university-list', 'university-facets'):
+            with self.subTest(route=name):
+                self.assertEqual(self.client.get(reverse(name), {'deadline_within': 3000000}).status_code, 400)
+
+    def test_deadline_facets_are_recomputed_the_next_day(self):
+        admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        self.client.force_authenticate(admin)
+        url = reverse('university-facets')
+        self.assertEqual(self.client.get(url, {'deadline_within': 2}).data['total'], 1)
+
+        tomorrow = timezone.now() + timedelta(days=1)
+        with mock.patch('django.utils.timezone.now', return_value=tomorrow):
+            self.assertEqual(self.client.get(url, {'deadline_within': 2}).data['total'], 2)
+
+    def test_orderings_break_ties_by_id(self):
+        admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        self.client.force_authenticate(admin)
+
+        def walk(ordering):
+            names = []
+            for page in range(1, 4):
+                response = self.client.get(reverse('university-list'), {'ordering': ordering, 'page_size': 1, 'page': page})
+                names += [u['name'] for u in response.data['results']]
+            return names
+
+        # Soon and Later share a popularity; paging through must neither repeat nor skip either of them.
+        self.assertEqual(walk('-popularity'), ['Soon', 'Later', 'Other'])
+        self.assertEqual(walk('popularity'), ['Other', 'Soon', 'Later'])
+
+
+class CatalogExportTests(TemporaryExportRootMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = University.objects.create(**university_payload('First'))
+        cls.second = University.objects.create(**university_payload('Second'))
+        cls.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def read_lines(self, content):
+        return [json.loads(line) for line in content.decode().splitlines()]
+
+    def test_snapshot_is_versioned_and_precompressed(self):
+        response = self.client.get(reverse('catalog-snapshot'))
+        self.assertEqual(response.status_code, 302)
+        version = int(response['Location'].rstrip('/').rsplit('/', 1)[1])
+
+        response = self.client.get(response['Location'], HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        lines = self.read_lines(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(lines[0]['version'], version)
+        self.assertEqual([row['name'] for row in lines[1:]], ['First', 'Second'])
+
+    def test_changes_since_a_version(self):
+        version = int(self.client.get(reverse('catalog-snapshot'))['Location'].rstrip('/').rsplit('/', 1)[1])
+        self.first.name = 'First (renamed)'
+        self.first.save()
+        second_pk = self.second.pk
+        self.second.delete()
+        University.objects.create(**university_payload('Third'))
+
+        response = self.client.get(reverse('catalog-changes'), {'since': version})
+        self.assertEqual(response.status_code, 200)
+        header, *changes = self.read_lines(response.content)
+        self.assertEqual(header['since'], version)
+        self.assertEqual(int(response['X-Catalog-Version']), header['version'])
+        self.assertEqual(
+            [(c['op'], c['data']['name'] if 'data' in c else c['id']) for c in changes],
+            [('upsert', 'First (renamed)'), ('upsert', 'Third'), ('delete', second_pk)],
+        )
+        self.assertEqual(self.client.get(reverse('catalog-changes'), {'since': header['version'] + 1}).status_code, 400)
+
+    def test_bulk_updated_columns_are_not_exported(self):
+        path = write_snapshot()
+        with open(path, 'rb') as f:
+            before = f.read()
+        University.objects.update(popularity=7, favorites_count=7, links_ok=False, links_checked_at=timezone.now())
+        os.remove(path)
+        with open(write_snapshot(), 'rb') as f:
+            self.assertEqual(self.read_lines(f.read())[1:], self.read_lines(before)[1:])
+
+        self.first.save()
+        _, lines = get_changes(0)
+        exported = {key for line in [*self.read_lines(before)[1:], json.loads(lines[1])['data']] for key in line}
+        self.assertFalse(exported & {'popularity', 'favorites_count', 'links_ok', 'links_checked_at'})
+
+
+class UniversityListFastPathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_universities(12)
+        University.objects.create(**{**university_payload('No Deadlines'), 'deadline_undergrad': None, 'deadline_grad': None})
+        cls.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+
+    def test_output_matches_university_serializer(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get(reverse('university-list'), {'page_size': 100})
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+        expected = JSONRenderer().render(UniversitySerializer(University.objects.order_by('id'), many=True).data)
+        self.assertEqual(json.loads(response.content)['results'], json.loads(expected))
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.a, cls.b, cls.c, cls.d = seed_universities(4)
+        cls.users = [User.objects.create_user(username=f'user{i}', password='pass', is_staff=True) for i in range(4)]
+        # a and b always appear together; c only once with a; d stands alone.
+        for user in cls.users[:3]:
+            user.dashboard.favorites.add(cls.a)
+            user.dashboard.applied.add(cls.b)
+        cls.users[0].dashboard.planning_to_apply.add(cls.c)
+        cls.users[3].dashboard.favorites.add(cls.d)
+        refresh_similarities(top_k=5)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_similar_universities_are_ranked_by_cooccurrence(self):
+        self.client.force_authenticate(self.users[3])
+        response = self.client.get(reverse('university-similar', kwargs={'pk': self.a.pk}))
+        self.assertEqual([u['id'] for u in response.data], [self.b.pk, self.c.pk])
+        self.assertEqual(self.client.get(reverse('university-similar', kwargs={'pk': self.d.pk})).data, [])
+        self.assertEqual(self.client.get(reverse('university-similar', kwargs={'pk': 9999})).status_code, 404)
+
+    def test_recommendations_exclude_the_users_own_lists(self):
+        self.client.force_authenticate(self.users[1])
+        response = self.client.get(reverse('dashboard-recommendations'))
+        self.assertEqual([u['id'] for u in response.data], [self.c.pk])
+
+
+class PopularityCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.a, cls.b = seed_universities(2)
+        cls.users = [User.objects.create_user(username=f'user{i}', password='pass') for i in range(3)]
+
+    def counters(self, university):
+        university.refresh_from_db()
+        return university.favorites_count, university.applied_count, university.popularity
+
+    def test_counters_follow_list_changes_from_both_sides(self):
+        first, second, third = (user.dashboard for user in self.users)
+        first.favorites.add(self.a, self.b)
+        first.favorites.add(self.a)
+        second.applied.add(self.a)
+        self.a.favorited_by.add(third)
+        self.assertEqual(self.counters(self.a), (2, 1, 3))
+
+        first.favorites.remove(self.a)
+        self.assertEqual(self.counters(self.a), (1, 1, 2))
+        # Removing links that do not exist leaves the counters alone.
+        first.favorites.remove(self.a)
+        self.a.favorited_by.remove(second, first)
+        self.assertEqual(self.counters(self.a), (1, 1, 2))
+        self.a.favorited_by.clear()
+        first.favorites.clear()
+        self.assertEqual(self.counters(self.a), (0, 1, 1))
+        self.assertEqual(self.counters(self.b), (0, 0, 0))
+
+    def test_reconcile_repairs_drift_and_popularity_ordering(self):
+        self.users[0].dashboard.favorites.add(self.b)
+        self.users[1].dashboard.applied.add(self.b)
+        University.objects.update(favorites_count=7, popularity=0)
+        with self.assertNumQueries(1):
+            reconcile_counters()
+        self.assertEqual(self.counters(self.a), (0, 0, 0))
+        self.assertEqual(self.counters(self.b), (1, 1, 2))
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='admin', password='pass', is_staff=True))
+        response = client.get(reverse('university-list'), {'ordering': '-popularity'})
+        self.assertEqual([u['id'] for u in response.data['results']], [self.b.pk, self.a.pk])
+        stats = client.get(reverse('admin-stats')).data
+        self.assertEqual(stats['funnel']['applied'], 1)
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tum = University.objects.create(**{**university_payload('Technical University of Munich'), 'country': 'Germany', 'city': 'München'})
+        cls.tech = University.objects.create(**{**university_payload('Munich Tech'), 'country': 'Germany', 'city': 'Munich'})
+        cls.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        cls.admin.dashboard.favorites.add(cls.tech)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def complete(self, q, **params):
+        return self.client.get(reverse('university-autocomplete'), {'q': q, **params}).data
+
+    def test_matches_word_prefixes_ranked_by_popularity(self):
+        self.assertEqual(
+            [(m['type'], m['label']) for m in self.complete('tech')],
+            [('university', 'Munich Tech'), ('university', 'Technical University of Munich')],
+        )
+        self.assertEqual(
+            [(m['type'], m['label']) for m in self.complete('mun', limit=3)],
+            [('city', 'Munich'), ('university', 'Munich Tech'), ('city', 'München')],
+        )
+        self.assertEqual(self.complete('Germ'), [{'type': 'country', 'label': 'Germany'}])
+        self.assertEqual(self.complete(''), [])
+
+    def test_index_is_rebuilt_when_the_catalog_changes(self):
+        self.assertEqual(self.complete('heidel'), [])
+        with self.assertNumQueries(0):
+            self.complete('heidel')
+        heidelberg = University.objects.create(**university_payload('Heidelberg University'))
+        self.assertEqual(self.complete('heidel'), [{'type': 'university', 'label': 'Heidelberg University', 'id': heidelberg.pk}])
+
+    def test_memo_holds_only_alphanumeric_prefixes_at_the_default_limit(self):
+        for q in ('mu', 'MU', 'm', '%', 'm%', '€', '日'):
+            self.complete(q)
+        for limit in range(1, 21):
+            self.complete('te', limit=limit)
+        self.assertEqual(set(get_index().memo), {'mu', 'm', 'te'})
+
+
+class UserExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_users(3, seed_universities(5))
+        cls.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        cls.admin.groups.add(Group.objects.create(name='admin'), Group.objects.get(name='user'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, **params):
+        response = self.client.get(reverse('user-export'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_joins_groups_and_subscriptions(self):
+        rows = list(csv.DictReader(self.export().splitlines()))
+        self.assertEqual([row['username'] for row in rows], ['student0', 'student1', 'student2', 'admin'])
+        self.assertEqual(rows[0]['subscription_status'], 'active')
+        self.assertEqual(rows[0]['phone_number'], '+251900000000')
+        self.assertEqual(rows[0]['groups'], 'user')
+        self.assertEqual(rows[3]['groups'], 'admin;user')
+
+    def test_csv_export_quotes_formulas(self):
+        User.objects.filter(username='student1').update(first_name='=HYPERLINK("https://evil.test")', last_name='@SUM(A1)')
+        User.objects.filter(username='student2').update(first_name='-2+3', last_name='\tTab')
+        rows = list(csv.DictReader(self.export().splitlines()))
+        self.assertEqual((rows[1]['first_name'], rows[1]['last_name']), ('\'=HYPERLINK("https://evil.test")', "'@SUM(A1)"))
+        self.assertEqual((rows[2]['first_name'], rows[2]['last_name']), ("'-2+3", "'\tTab"))
+        self.assertEqual(rows[1]['phone_number'], '+251900000001')
+
+    def test_jsonl_export(self):
+        rows = [json.loads(line) for line in self.export(file_format='jsonl').splitlines()]
+        self.assertEqual(rows[3]['groups'], ['admin', 'user'])
+        self.assertEqual(rows[3]['subscription_status'], 'none')
+        self.assertEqual(self.client.get(reverse('user-export'), {'file_format': 'xml'}).status_code, 400)
+
+
+class ThrottleTests(TestCase):
+    """Token buckets in the local-memory cache, standing in for the shared Redis cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.now = 1000.0
+        patcher = mock.patch.object(ScopedTokenBucketThrottle, 'timer', lambda throttle: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login(self):
+        return self.client.post('/api/token/', {'username': 'nobody', 'password': 'wrong'}, format='json')
+
+    @mock.patch.dict(ScopedTokenBucketThrottle.THROTTLE_RATES, {'auth': '3/min'})
+    def test_bucket_allows_a_burst_then_refills(self):
+        self.assertEqual([self.login().status_code for _ in range(3)], [401, 401, 401])
+        throttled = self.login()
+        self.assertEqual(throttled.status_code, 429)
+        self.assertEqual(throttled['Retry-After'], '20')
+
+        self.now += 20
+        self.assertEqual(self.login().status_code, 401)
+        self.assertEqual(self.login().status_code, 429)
+
+    @mock.patch.dict(ScopedTokenBucketThrottle.THROTTLE_RATES, {'auth': '3/min'})
+    def test_forged_forwarded_for_headers_share_a_bucket(self):
+        statuses = [
+            self.client.post(
+                '/api/token/', {'username': 'nobody', 'password': 'wrong'}, format='json',
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, 203.0.113.7',
+            ).status_code
+            for i in range(5)
+        ]
+        self.assertEqual(statuses, [401, 401, 401, 429, 429])
+
+    @mock.patch.dict(ScopedTokenBucketThrottle.THROTTLE_RATES, {'search': '1/min'})
+    def test_only_text_search_is_throttled_per_user(self):
+        users = [User.objects.create_user(username=f'admin{i}', password='pass', is_staff=True) for i in range(2)]
+        url = reverse('university-list')
+        self.client.force_authenticate(users[0])
+        self.assertEqual(self.client.get(url, {'search': 'a'}).status_code, 200)
+        self.assertEqual(self.client.get(url, {'search': 'b'}).status_code, 429)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.force_authenticate(users[1])
+        self.assertEqual(self.client.get(url, {'search': 'a'}).status_code, 200)
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        seed_universities(30)
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='pass', is_staff=True))
+
+    def test_large_responses_are_gzipped_and_cached_variants_reused(self):
+        url = reverse('university-facets')
+        plain = self.client.get(url, HTTP_ACCEPT_ENCODING='identity')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertGreater(len(plain.content), 1024)
+
+        first = self.client.get(url, HTTP_ACCEPT_ENCODING='br;q=0, zstd;q=0, gzip')
+        with mock.patch('universities.compression.compress') as compress:
+            second = self.client.get(url, HTTP_ACCEPT_ENCODING='br;q=0, zstd;q=0, gzip')
+        compress.assert_not_called()
+
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', first['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(first.content)), json.loads(plain.content))
+        self.assertEqual(second.content, first.content)
+
+    def test_indented_json_is_cached_separately(self):
+        url = reverse('university-facets')
+        compact = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        indented = self.client.get(url, HTTP_ACCEPT='application/json; indent=4', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn(b'\n', gzip.decompress(compact.content))
+        self.assertIn(b'\n  ', gzip.decompress(indented.content))
+        again = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(again.content, compact.content)
+
+    def test_browsable_api_pages_are_not_shared_between_users(self):
+        url = reverse('university-facets')
+        pages = {}
+        for username in ('alice', 'bob'):
+            self.client.force_authenticate(User.objects.create_user(username=username, password='pass', is_staff=True))
+            page = self.client.get(url, HTTP_ACCEPT='text/html', HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(page['Content-Encoding'], 'gzip')
+            pages[username] = gzip.decompress(page.content).decode()
+        self.assertIn('bob', pages['bob'])
+        self.assertNotIn('alice', pages['bob'])
+
+    def test_admin_pages_are_not_compressed(self):
+        page = Client().get('/admin/login/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(page.status_code, 200)
+        self.assertGreater(len(page.content), 1024)
+        self.assertNotIn('Content-Encoding', page)
+
+    def test_small_responses_are_left_alone(self):
+        response = self.client.get(reverse('university-autocomplete'), {'q': 'zzz'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+
+
+class SiteMiddlewareTests(TestCase):
+    def test_admin_keeps_the_cookie_middleware(self):
+        client = Client(enforce_csrf_checks=True)
+        page = client.get('/admin/login/')
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(page['X-Frame-Options'], 'DENY')
+        self.assertIn('csrftoken', page.cookies)
+        self.assertEqual(client.post('/admin/login/', {'username': 'a', 'password': 'b'}).status_code, 403)
+
+        User.objects.create_superuser(username='root', password='pass')
+        client = Client()
+        client.post('/admin/login/', {'username': 'root', 'password': 'pass'})
+        self.assertEqual(client.get('/admin/').status_code, 200)
+
+    def test_api_skips_it(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='admin', password='pass', is_staff=True))
+        response = client.get(reverse('group-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Frame-Options', response)
+        self.assertFalse(response.cookies)
+
+
+class WarmUpTests(TestCase):
+    def test_warm_up_fills_catalog_caches(self):
+        cache.clear()
+        seed_universities(5)
+        self.assertEqual(list(warm_up()), [name for name, _ in WARM_UP_STEPS])
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='admin', password='pass', is_staff=True))
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse('university-facets'))
+        self.assertEqual(len(queries), 0)
+
+    def test_serializers_chosen_per_action_are_primed(self):
+        with mock.patch.object(ModelSerializer, 'get_fields', autospec=True, return_value={}) as get_fields:
+            prime_serializers()
+        primed = {type(call.args[0]) for call in get_fields.call_args_list}
+        self.assertLessEqual({UserSerializer, UserDetailSerializer}, primed)
+
+    def test_failing_steps_are_logged(self):
+        with mock.patch('universities.warmup.get_index', side_effect=RuntimeError), self.assertLogs('universities.warmup', 'ERROR'):
+            warm_up()
+
+
+class LinkStandInHandler(BaseHTTPRequestHandler):
+    """Local stand-in for university websites."""
+    protocol_version = 'HTTP/1.1'
+
+    def respond(self, body):
+        path = self.path.partition('?')[0]
+        if path == '/moved':
+            self.send_response(301)
+            self.send_header('Location', '/ok')
+        elif path == '/no-head' and self.command == 'HEAD':
+            self.send_response(405)
+        elif path in ('/ok', '/no-head'):
+            self.send_response(200)
+        else:
+            self.send_response(404)
+        self.send_header('Content-Length', str(len(b'body')))
+        self.end_headers()
+        if body:
+            self.wfile.write(b'body')
+
+    def do_HEAD(self):
+        self.respond(body=False)
+
+    def do_GET(self):
+        self.respond(body=True)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LinkCheckTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), LinkStandInHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def test_links_are_checked_and_filterable(self):
+        healthy, broken = seed_universities(2)
+        healthy.university_link, healthy.application_link = f'{self.base_url}/moved', f'{self.base_url}/no-head'
+        broken.university_link, broken.application_link = f'{self.base_url}/ok', f'{self.base_url}/missing'
+        University.objects.bulk_update([healthy, broken], ['university_link', 'application_link'])
+        unreachable = University.objects.create(**{
+            **university_payload('Offline'), 'university_link': 'http://127.0.0.1:1/', 'application_link': '',
+        })
+
+        call_command('check_links', per_host_interval=0, timeout=2, stdout=io.StringIO())
+
+        statuses = {
+            university.pk: (university.university_link_status, university.application_link_status, university.links_ok)
+            for university in University.objects.all()
+        }
+        self.assertEqual(statuses, {
+            healthy.pk: (200, 200, True),
+            broken.pk: (200, 404, False),
+            unreachable.pk: (0, None, False),
+        })
+        self.assertEqual(University.objects.filter(links_checked_at__isnull=False).count(), 3)
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='admin', password='pass', is_staff=True))
+        response = client.get(reverse('university-list'), {'links_ok': 'false'})
+        self.assertEqual(sorted(row['id'] for row in response.json()['results']), [broken.pk, unreachable.pk])
+
+    def test_checked_universities_are_saved_when_a_run_fails(self):
+        done, failed = seed_universities(2)
+        done.university_link, failed.university_link = f'{self.base_url}/ok', f'{self.base_url}/ok?fail'
+        done.application_link = failed.application_link = ''
+        University.objects.bulk_update([done, failed], ['university_link', 'application_link'])
+
+        def fetch(pool, url):
+            if url.endswith('?fail'):
+                raise RuntimeError('connection pool crashed')
+            return fetch_status(pool, url)
+
+        with mock.patch('universities.linkcheck.fetch_status', side_effect=fetch), self.assertRaises(RuntimeError):
+            check_university_links(concurrency=1, per_host_interval=0, timeout=2, batch_size=1)
+        self.assertEqual(
+            dict(University.objects.values_list('pk', 'university_link_status')),
+            {done.pk: 200, failed.pk: None},
+        )
+
+    def test_requests_to_one_host_are_spaced_out(self):
+        urls = [f'{self.base_url}/ok?page={i}' for i in range(3)]
+        start = time.monotonic()
+        self.assertEqual(check_urls(urls, concurrency=3, per_host_interval=0.1), dict.fromkeys(urls, 200))
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    SMS_BACKEND='universities.sms.LocmemBackend',
+    REMINDER_DEADLINE_DAYS=14,
+    REMINDER_SUBSCRIPTION_DAYS=3,
+)
+class ReminderTests(TestCase):
+    def setUp(self):
+        sms.outbox.clear()
+        today = date.today()
+        soon, later, far = seed_universities(3)
+        University.objects.filter(pk=soon.pk).update(deadline_undergrad=today + timedelta(days=5), deadline_grad=None)
+        University.objects.filter(pk=later.pk).update(deadline_undergrad=today + timedelta(days=3), deadline_grad=today + timedelta(days=3))
+        University.objects.filter(pk=far.pk).update(deadline_undergrad=None, deadline_grad=today + timedelta(days=30))
+
+        self.texted = User.objects.create_user(username='texted', email='texted@example.com', first_name='Tess')
+        dashboard = self.texted.dashboard
+        dashboard.phone_number = '+251900000001'
+        dashboard.subscription_status = 'active'
+        dashboard.subscription_end_date = today + timedelta(days=2)
+        dashboard.save()
+        dashboard.planning_to_apply.add(soon, later, far)
+
+        emailed = User.objects.create_user(username='emailed', email='emailed@example.com')
+        emailed.dashboard.planning_to_apply.add(soon)
+        inactive = User.objects.create_user(username='inactive', email='inactive@example.com', is_active=False)
+        inactive.dashboard.planning_to_apply.add(soon)
+
+    def test_reminders_are_batched_and_sent_once(self):
+        with mock.patch('universities.reminders.time.sleep') as sleep, self.assertNumQueries(3 + 2 + 1):
+            sent = send_reminders(batch_size=1, batch_interval=0.5)
+        self.assertEqual(sent, {'email': 2, 'sms': 1})
+        sleep.assert_called_once_with(0.5)
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['emailed@example.com', 'texted@example.com'])
+        body = next(message.body for message in mail.outbox if message.to == ['texted@example.com'])
+        self.assertEqual(body.count('\n- '), 3)
+        self.assertEqual(len(sms.outbox), 1)
+        self.assertEqual(sms.outbox[0].to, '+251900000001')
+        self.assertIn('subscription ends', sms.outbox[0].body)
+        self.assertIn('+2 more', sms.outbox[0].body)
+        self.assertEqual(ReminderLog.objects.count(), 3 + 3 + 1)
+
+        call_command('send_reminders', batch_interval=0, stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(len(sms.outbox), 1)
+
+    def test_new_deadline_is_reminded_again(self):
+        send_reminders(batch_interval=0)
+        University.objects.filter(deadline_undergrad=date.today() + timedelta(days=5)).update(
+            deadline_undergrad=date.today() + timedelta(days=6),
+        )
+        self.assertEqual(send_reminders(batch_interval=0), {'email': 2, 'sms': 1})
+
+    def test_sms_waits_for_a_configured_backend(self):
+        with override_settings(SMS_BACKEND=''):
+            self.assertEqual(send_reminders(batch_interval=0), {'email': 2, 'sms': 0})
+        self.assertFalse(ReminderLog.objects.filter(channel='sms').exists())
+        self.assertEqual(send_reminders(batch_interval=0), {'email': 0, 'sms': 1})
+
+
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.enterClassContext(override_settings(PROFILING_ENABLED=True, PROFILING_KEEP=2))
+        super().setUpClass()
+
+    def setUp(self):
+        self.enterContext(override_settings(PROFILING_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        self.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        self.student = User.objects.create_user(username='student', password='pass')
+
+    def get_stats(self, user=None, **extra):
+        client = APIClient()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client.get(reverse('admin-stats'), **extra)
+
+    def test_staff_can_profile_a_request(self):
+        response = self.get_stats(self.admin, HTTP_X_PROFILE='1')
+        profile_id = response['X-Profile-Id']
+        self.assertNotIn('X-Profile-Id', self.get_stats(self.student, HTTP_X_PROFILE='1'))
+        self.assertNotIn('X-Profile-Id', self.get_stats(self.admin))
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        [listed] = client.get(reverse('profile-list')).json()
+        self.assertEqual((listed['id'], listed['view'], listed['trigger']), (profile_id, 'admin-stats', 'request'))
+
+        detail = client.get(reverse('profile-detail', args=[profile_id])).json()
+        self.assertEqual(detail['query_count'], len(detail['queries']))
+        self.assertTrue(any('auth_user' in query['sql'] for query in detail['queries']))
+        self.assertIn('funnel_totals', detail['summary'])
+
+        download = client.get(reverse('profile-download', args=[profile_id]))
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(b''.join(download.streaming_content))
+        self.assertEqual(client.get(reverse('profile-download', args=['..%2Fsecret'])).status_code, 404)
+
+    def test_sampled_profiles_are_bounded(self):
+        with override_settings(PROFILING_SAMPLE_RATE=1.0):
+            ids = [self.get_stats()['X-Profile-Id'] for _ in range(3)]
+        self.assertEqual([profile['id'] for profile in list_profiles()], sorted(ids[1:], reverse=True))
+
+    def test_concurrent_profiles_are_skipped(self):
+        with override_settings(PROFILING_SAMPLE_RATE=1.0):
+            with profiler_lock:
+                busy = self.get_stats()
+            with mock.patch('cProfile.Profile.enable', side_effect=ValueError('Another profiling tool is already active')):
+                taken = self.get_stats()
+            self.assertIn('X-Profile-Id', self.get_stats())
+        for response in (busy, taken):
+            self.assertEqual(response.status_code, 401)
+            self.assertNotIn('X-Profile-Id', response)
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled_by_default(self):
+        self.assertNotIn('X-Profile-Id', self.get_stats(self.admin, HTTP_X_PROFILE='1'))
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.universities = seed_universities(3)
+        self.student = seed_users(1, self.universities[:1])[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.url = reverse('dashboard')
+
+    def assertCached(self):
+        with self.assertNumQueries(0):
+            return self.client.get(self.url).json()
+
+    def assertRefreshed(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(self.url).json()
+        self.assertGreater(len(queries), 0)
+        return data
+
+    def test_repeat_loads_are_served_from_cache(self):
+        first = self.assertRefreshed()
+        self.assertEqual(self.assertCached(), first)
+
+    def test_dashboard_changes_invalidate_it(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.dashboard.planning_to_apply.add(self.universities[2])
+        self.assertIn(self.universities[2].pk, [item['id'] for item in self.assertRefreshed()['planning_to_apply']])
+
+        dashboard = UserDashboard.objects.get(user=self.student)
+        dashboard.subscription_status = 'expired'
+        with self.captureOnCommitCallbacks(execute=True):
+            dashboard.save()
+        self.assertEqual(self.assertRefreshed()['subscription_status'], 'expired')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.url, {'first_name': 'Renamed'}, format='json')
+        self.assertEqual(self.assertRefreshed()['first_name'], 'Renamed')
+
+        University.objects.get(pk=self.universities[0].pk).save()
+        self.assertRefreshed()
+        self.assertCached()
+
+    def test_invalidated_only_once_the_change_commits(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.dashboard.favorites.add(self.universities[2])
+            self.universities[0].favorited_by.clear()
+            self.assertCached()
+        favorites = [item['id'] for item in self.assertRefreshed()['favorites']]
+        self.assertEqual(favorites, [self.universities[2].pk])
+
+    def test_logins_do_not_invalidate_it(self):
+        self.client.get(self.url)
+        update_last_login(None, User.objects.get(pk=self.student.pk))
+        self.assertCached()
+
+
+@override_settings(CHAPA_WEBHOOK_SECRET='webhook-secret', WEBHOOK_CANONICAL_FALLBACK=True)
+class PaymentWebhookTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.create_user(username='payer', password='pass')
+        self.client = APIClient()
+        self.url = reverse('chapa_webhook')
+
+    def payload(self, **extra):
+        return {'tx_ref': f'unifinder-{self.student.pk}-abc123', 'status': 'success', 'amount': '100.00', **extra}
+
+    def post(self, body, signature=None):
+        signature = signature or hmac.new(b'webhook-secret', body, hashlib.sha256).hexdigest()
+        with self.assertLogs('universities', 'INFO'):
+            return self.client.generic('POST', self.url, body, content_type='application/json', HTTP_CHAPA_SIGNATURE=signature)
+
+    def end_date(self):
+        return UserDashboard.objects.get(user=self.student).subscription_end_date
+
+    def test_raw_body_signature_extends_subscription_once(self):
+        body = json.dumps(self.payload(), indent=2).encode()
+        response = self.post(body)
+        self.assertEqual(response.json(), {'status': 'success'})
+        self.assertEqual(self.end_date(), date.today() + timedelta(days=30))
+
+        self.assertEqual(self.post(body).json(), {'status': 'duplicate, ignored'})
+        self.assertEqual(self.end_date(), date.today() + timedelta(days=30))
+
+    def test_canonical_signature_is_a_configurable_fallback(self):
+        data = self.payload()
+        body = json.dumps(data, indent=2).encode()
+        canonical = hmac.new(b'webhook-secret', json.dumps(data, separators=(',', ':')).encode(), hashlib.sha256).hexdigest()
+        with override_settings(WEBHOOK_CANONICAL_FALLBACK=False):
+            self.assertEqual(self.post(body, canonical).status_code, 401)
+        self.assertEqual(self.post(body, canonical).status_code, 200)
+
+    @override_settings(WEBHOOK_CANONICAL_FALLBACK=False)
+    def test_bad_signatures_are_rejected_before_parsing(self):
+        with mock.patch('universities.webhooks.orjson.loads') as loads:
+            response = self.post(json.dumps(self.payload()).encode(), signature='0' * 64)
+        self.assertEqual(response.status_code, 401)
+        loads.assert_not_called()
+        with self.assertLogs('universities', 'WARNING'):
+            self.assertEqual(self.client.post(self.url, self.payload(), format='json').status_code, 401)
+        self.assertIsNone(self.end_date())
@@ -0,0 +1,73 @@
+import math
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket throttle. The rate's request count is the burst capacity and
+    the bucket refills evenly over the rate's period, so '10/min' allows a
+    burst of 10 and then one request every 6 seconds.
+
+    The bucket is one (tokens, timestamp) entry in the default cache, which is
+    shared by every worker when REDIS_URL is configured. The read and write
+    are not atomic, so concurrent requests from the same client may
+    occasionally both take the last token.
+
+    Authenticated requests are limited per user, anonymous ones per IP.
+    """
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        refill_rate = self.num_requests / self.duration
+        tokens, updated_at = self.cache.get(self.key, (self.num_requests, self.now))
+        tokens = min(self.num_requests, tokens + (self.now - updated_at) * refill_rate)
+        if tokens < 1:
+            self.retry_after = (1 - tokens) / refill_rate
+            return False
+        # An untouched bucket is full again after one period, so it can expire then.
+        self.cache.set(self.key, (tokens - 1, self.now), self.duration)
+        return True
+
+    def wait(self):
+        return math.ceil(getattr(self, 'retry_after', 0)) or None
+
+
+class ScopedTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Token bucket limited per endpoint group: the rate is looked up from the
+    view's `throttle_scope` in DEFAULT_THROTTLE_RATES.
+    """
+    def __init__(self):
+        # The rate depends on the view, so it is resolved in allow_request().
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+
+class SearchRateThrottle(ScopedTokenBucketThrottle):
+    """Only throttles catalog requests that run a text search."""
+    def allow_request(self, request, view):
+        if not request.query_params.get('search'):
+            return True
+        return super().allow_request(request, view)
@@ -9,14 +9,25 @@ router.register(r'users', views.UserViewSet, basename='user')
 urlpatterns = [
     path('', include(router.urls)),
     path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
+    path('dashboard/recommendations/', views.RecommendationsView.as_view(), name='dashboard-recommendations'),
+    path('dashboard/deadlines/', views.UpcomingDeadlinesView.as_view(), name='dashboard-deadlines'),
     path('groups/', views.GroupList.as_view(), name='group-list'),
     
     path('chapa/initialize/', InitializeChapaPaymentView.as_view(), name='initialize_chapa_payment'),
     path('admin/stats/', views.AdminStatsView.as_view(), name='admin-stats'),
+    path('admin/profiles/', views.ProfileListView.as_view(), name='profile-list'),
+    path('admin/profiles/<str:profile_id>/', views.ProfileDetailView.as_view(), name='profile-detail'),
+    path('admin/profiles/<str:profile_id>/download/', views.ProfileDownloadView.as_view(), name='profile-download'),
     path('universities/', views.UniversityList.as_view(), name='university-list'),
+    path('universities/autocomplete/', views.UniversityAutocompleteView.as_view(), name='university-autocomplete'),
+    path('universities/facets/', views.UniversityFacets.as_view(), name='university-facets'),
+    path('catalog/snapshot/', views.CatalogSnapshotView.as_view(), name='catalog-snapshot'),
+    path('catalog/snapshot/<int:version>/', views.CatalogSnapshotView.as_view(), name='catalog-snapshot-version'),
+    path('catalog/changes/', views.CatalogChangesView.as_view(), name='catalog-changes'),
     path('universities/create/', views.create_university, name='create_university'),
     path('universities/bulk_create/', views.UniversityBulkCreate.as_view(), name='university-bulk-create'),
     path('universities/<int:pk>/', views.get_university_detail, name='university_detail'),
+    path('universities/<int:pk>/similar/', views.SimilarUniversitiesView.as_view(), name='university-similar'),
     path('universities/<int:pk>/update/', views.update_university, name='update_university'),
     path('universities/<int:pk>/delete/', views.delete_university, name='delete_university'),
 ]
\ No newline at end of file
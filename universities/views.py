@@ -1,4 +1,6 @@
-from django.shortcuts import render
+from django.shortcuts import render, redirect
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.conf import settings
 
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Count
@@ -9,29 +11,63 @@ from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
+from whitenoise.middleware import WhiteNoiseMiddleware
 from django.utils import timezone
 from datetime import timedelta
 import os
+import logging
 import uuid
-import requests
 import json
 import hmac
-import hashlib
 
 # Create your views here.
 
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from .models import University, UserDashboard
+from .metrics import PROMETHEUS_CONTENT_TYPE, registry as metrics_registry
+from .catalog import facets_cache_key, get_facets
+from .dashboards import dashboard_cache_key, get_serialized_dashboard, get_upcoming_deadlines, upcoming_deadlines_cache_key
+from .filters import StableOrderingFilter, UniversityFilter
+from .recommendations import get_recommendations, get_similar
+from .popularity import funnel_totals
+from .profiling import list_profiles, load_profile, profile_path
+from .autocomplete import DEFAULT_LIMIT as AUTOCOMPLETE_DEFAULT_LIMIT, MAX_LIMIT as AUTOCOMPLETE_MAX_LIMIT, autocomplete
+from .user_export import iter_user_rows, stream_csv, stream_jsonl
+from .exports import SNAPSHOT_CONTENT_TYPE, get_changes, get_export_version, snapshot_path, snapshot_server, write_snapshot
 from .permissions import HasActiveSubscription
-from .serializers import UniversitySerializer, UserSerializer, UserDetailSerializer, UserDashboardSerializer, GroupSerializer, UserProfileUpdateSerializer
+from .throttling import SearchRateThrottle
+from .webhooks import WebhookRejected, claim_nonce, release_nonce, verify_webhook
+from .serializers import UniversitySerializer, UniversityRowEncoder, UserSerializer, UserDetailSerializer, UserDashboardSerializer, GroupSerializer, UserProfileUpdateSerializer
 from rest_framework.pagination import PageNumberPagination
 from rest_framework import filters as drf_filters
 
+logger = logging.getLogger(__name__)
+
+def metrics(request):
+    """
+    Expose the request metrics of every worker in the Prometheus text format.
+    Scrapers send METRICS_TOKEN as a Bearer token; without a token configured
+    only staff users logged in to the admin can read them.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse(status=401)
+    elif not request.user.is_staff:
+        return HttpResponse(status=403)
+    return HttpResponse(metrics_registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+USER_EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'jsonl': (stream_jsonl, 'application/x-ndjson'),
+}
+
 class CreateUserView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'register'
 
 class UserViewSet(viewsets.ModelViewSet):
     """
@@ -53,6 +89,21 @@ class UserViewSet(viewsets.ModelViewSet):
         headers = self.get_success_headers(detail_serializer.data)
         return Response(detail_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Stream every user with their groups and subscription as CSV (default)
+        or JSON Lines (`?file_format=jsonl`).
+        """
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in USER_EXPORT_FORMATS:
+            return Response({'error': f'Invalid file_format: {file_format}'}, status=status.HTTP_400_BAD_REQUEST)
+        stream, content_type = USER_EXPORT_FORMATS[file_format]
+        response = StreamingHttpResponse(stream(iter_user_rows()), content_type=content_type)
+        filename = f"users-{timezone.now():%Y%m%d}.{file_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
 @api_view(['POST'])
 @permission_classes([IsAdminUser]) # Example: Only admins can create
 def create_university(request):
@@ -87,10 +138,10 @@ class DashboardView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        # get_or_create ensures a dashboard exists if the signal failed for some reason
-        dashboard, created = UserDashboard.objects.get_or_create(user=request.user)
-        serializer = UserDashboardSerializer(dashboard)
-        return Response(serializer.data)
+        key = dashboard_cache_key(request.user.id)
+        response = Response(get_serialized_dashboard(request.user, key))
+        response.compression_cache_key = key
+        return response
 
     def post(self, request):
         dashboard, created = UserDashboard.objects.get_or_create(user=request.user)
@@ -125,25 +176,148 @@ class DashboardView(APIView):
         final_serializer = UserDashboardSerializer(dashboard)
         return Response(final_serializer.data, status=status.HTTP_200_OK)
 
+class UpcomingDeadlinesView(APIView):
+    """
+    Universities from the user's favorites and planning_to_apply lists whose
+    undergraduate or graduate deadline falls within the next `days` days.
+    """
+    permission_classes = [IsAuthenticated]
+    max_days = 365
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= days <= self.max_days:
+            return Response({'error': f'days must be between 0 and {self.max_days}'}, status=status.HTTP_400_BAD_REQUEST)
+        key = upcoming_deadlines_cache_key(request.user.id, days)
+        response = Response(get_upcoming_deadlines(request.user.id, days, key))
+        response.compression_cache_key = key
+        return response
+
+def _limit_param(request, default=10, maximum=50):
+    try:
+        return max(1, min(int(request.query_params.get('limit', default)), maximum))
+    except ValueError:
+        return default
+
+class SimilarUniversitiesView(APIView):
+    """Universities most often kept on the same dashboards as this one."""
+    permission_classes = [IsAuthenticated, HasActiveSubscription]
+
+    def get(self, request, pk):
+        similar = get_similar(pk, _limit_param(request))
+        if not similar and not University.objects.filter(id=pk).exists():
+            return Response({'error': 'University not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(similar)
+
+class RecommendationsView(APIView):
+    """Universities similar to the ones on the user's dashboard that are not on it yet."""
+    permission_classes = [IsAuthenticated, HasActiveSubscription]
+
+    def get(self, request):
+        return Response(get_recommendations(request.user.id, _limit_param(request)))
+
+class UniversityAutocompleteView(APIView):
+    """
+    Top matches for a search-box prefix across university names, countries
+    and cities, served from an in-memory index instead of the database.
+    """
+    permission_classes = [IsAuthenticated, HasActiveSubscription]
+    throttle_scope = 'autocomplete'
+
+    def get(self, request):
+        return Response(autocomplete(request.query_params.get('q', ''), _limit_param(request, default=AUTOCOMPLETE_DEFAULT_LIMIT, maximum=AUTOCOMPLETE_MAX_LIMIT)))
+
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class UniversityList(generics.ListAPIView):
+class UniversityCatalogMixin:
+    """
+    Catalog filtering shared by the university list and its facet counts,
+    so both always describe the same set of universities.
+    """
     queryset = University.objects.all()
-    serializer_class = UniversitySerializer
     permission_classes = [IsAuthenticated, HasActiveSubscription]
-    pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, drf_filters.SearchFilter]
-    filterset_fields = {
-        'country': ['icontains'],
-        'city': ['icontains'],
-        'course_offered': ['icontains'],
-        'application_fee': ['lte'],
-        'tuition_fee': ['lte'],
-    }
+    filter_backends = [DjangoFilterBackend, drf_filters.SearchFilter, StableOrderingFilter]
+    filterset_class = UniversityFilter
     search_fields = ['name', 'country', 'course_offered']
+    ordering_fields = ['name', 'application_fee', 'tuition_fee', 'deadline_undergrad', 'deadline_grad', 'popularity']
+    ordering = ['id']
+
+class UniversityList(UniversityCatalogMixin, generics.ListAPIView):
+    serializer_class = UniversitySerializer
+    pagination_class = StandardResultsSetPagination
+    throttle_classes = [SearchRateThrottle]
+    throttle_scope = 'search'
+    row_encoder = UniversityRowEncoder()
+
+    def list(self, request, *args, **kwargs):
+        # Read path: serialize value tuples instead of model instances, producing
+        # the same output as UniversitySerializer at a fraction of the cost.
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(self.row_encoder.rows(queryset))
+        return self.get_paginated_response(self.row_encoder.encode(page))
+
+class UniversityFacets(UniversityCatalogMixin, generics.GenericAPIView):
+    """
+    Counts per country, city and course plus fee histograms for the
+    universities matching the current filters. Accepts the same query
+    parameters as UniversityList.
+    """
+    def get(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        key = facets_cache_key(request.query_params)
+        response = Response(get_facets(queryset, key))
+        response.compression_cache_key = key
+        return response
+
+class CatalogSnapshotView(APIView):
+    """
+    Full catalog export as JSON Lines. Without a version this redirects to the
+    immutable, versioned URL of the current snapshot, writing it first if the
+    catalog changed since the last export.
+    """
+    permission_classes = [IsAuthenticated, HasActiveSubscription]
+
+    def get(self, request, version=None):
+        if version is None:
+            version = get_export_version()
+            write_snapshot(version)
+            return redirect('catalog-snapshot-version', version=version)
+
+        path = snapshot_path(version)
+        if not os.path.exists(path):
+            if version != get_export_version():
+                return Response({'error': f'Snapshot {version} is no longer available. Download the current snapshot instead.'}, status=status.HTTP_404_NOT_FOUND)
+            write_snapshot(version)
+        static_file = snapshot_server.get_static_file(path, request.path_info)
+        response = WhiteNoiseMiddleware.serve(static_file, request)
+        response['X-Catalog-Version'] = str(version)
+        return response
+
+class CatalogChangesView(APIView):
+    """
+    Universities created, updated or deleted after the catalog version given
+    in `since`, as JSON Lines, so clients can sync a snapshot incrementally.
+    """
+    permission_classes = [IsAuthenticated, HasActiveSubscription]
+
+    def get(self, request):
+        try:
+            since = int(request.query_params['since'])
+        except (KeyError, ValueError):
+            return Response({'error': 'since must be a catalog version'}, status=status.HTTP_400_BAD_REQUEST)
+        if since < 0 or since > get_export_version():
+            return Response({'error': f'Unknown catalog version: {since}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        version, lines = get_changes(since)
+        response = HttpResponse('\n'.join(lines) + '\n', content_type=SNAPSHOT_CONTENT_TYPE)
+        response['X-Catalog-Version'] = str(version)
+        return response
 
 class InitializeChapaPaymentView(APIView):
     permission_classes = [IsAuthenticated]
@@ -192,6 +366,10 @@ class InitializeChapaPaymentView(APIView):
             "customization[description]": "1-Month Subscription Renewal",
         }
 
+        # Imported here rather than at module level: only this view needs it
+        # and it is one of the slowest imports on worker start.
+        import requests
+
         try:
             chapa_init_url = "https://api.chapa.co/v1/transaction/initialize"
             response = requests.post(chapa_init_url, headers=headers, json=payload)
@@ -237,6 +415,10 @@ def update_university(request, pk):
 @method_decorator(csrf_exempt, name='dispatch')
 class PaymentWebhookView(APIView):
     permission_classes = [AllowAny]
+    authentication_classes = []
+    # The body is verified and parsed in post(); DRF's parsers never run.
+    parser_classes = []
+    throttle_scope = 'webhook'
 
     def get(self, request, *args, **kwargs):
         # This GET handler is for debugging purposes.
@@ -248,58 +430,31 @@ class PaymentWebhookView(APIView):
         }, status=status.HTTP_200_OK)
 
     def post(self, request, *args, **kwargs):
-        # --- Enhanced Logging for Debugging ---
-        print("--- Chapa Webhook Received ---")
-        print(f"Headers: {request.headers}")
-        print(f"Raw Body: {request.body.decode('utf-8', errors='ignore')}")
-        # --- End Enhanced Logging ---
-
-        # 1. Webhook Signature Verification
-        chapa_webhook_secret = os.environ.get("CHAPA_WEBHOOK_SECRET")
-        if not chapa_webhook_secret:
-            print("Chapa webhook secret is not configured.")
-            return Response({'status': 'error', 'message': 'Internal server error: Webhook secret not configured.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        logger.info("Chapa webhook received")
+        logger.debug("Chapa webhook body: %s", request.body.decode('utf-8', errors='ignore'))
 
-        # Chapa may send the signature in either of these headers. DRF headers are case-insensitive.
-        chapa_signature = request.headers.get('Chapa-Signature')
-        x_chapa_signature = request.headers.get('X-Chapa-Signature')
+        # 1. Webhook signature verification, on the raw body before any parsing.
+        try:
+            webhook_data, signature = verify_webhook(request)
+        except WebhookRejected as exc:
+            logger.warning("Rejected Chapa webhook: %s", exc)
+            return Response({'status': 'error', 'message': str(exc)}, status=exc.status_code)
 
-        if not chapa_signature and not x_chapa_signature:
-            return Response({'status': 'error', 'message': 'Webhook signature not found.'}, status=status.HTTP_401_UNAUTHORIZED)
+        # Chapa retries deliveries it considers failed, and a captured request
+        # could be replayed; either way it must not extend a subscription twice.
+        if not claim_nonce(signature):
+            logger.info("Ignoring replayed Chapa webhook for tx_ref %s", webhook_data.get('tx_ref'))
+            return Response({'status': 'duplicate, ignored'}, status=status.HTTP_200_OK)
 
         try:
-            # Chapa's webhook signature seems to be based on a canonicalized JSON string,
-            # not the raw request body. We will re-serialize the parsed data to match this.
-            # Using separators=(',', ':') creates a compact JSON string without whitespace.
-            payload_string = json.dumps(request.data, separators=(',', ':')).encode('utf-8')
-
-            # Calculate the expected hash
-            expected_hash = hmac.new(
-                chapa_webhook_secret.encode('utf-8'),
-                msg=payload_string,
-                digestmod=hashlib.sha256
-            ).hexdigest()
-
-            # Check if either signature is valid
-            chapa_sig_valid = chapa_signature and hmac.compare_digest(chapa_signature, expected_hash)
-            x_chapa_sig_valid = x_chapa_signature and hmac.compare_digest(x_chapa_signature, expected_hash)
-
-            if not (chapa_sig_valid or x_chapa_sig_valid):
-                print(f"Signature mismatch. Expected: {expected_hash}")
-                print(f"  Received Chapa-Signature: {chapa_signature}")
-                print(f"  Received X-Chapa-Signature: {x_chapa_signature}")
-                print(f"  Canonical JSON for signing: {payload_string.decode('utf-8', errors='ignore')}")
-                return Response({'status': 'error', 'message': 'Invalid webhook signature.'}, status=status.HTTP_401_UNAUTHORIZED)
-        
-        except Exception as e:
-            print(f"Error during signature verification: {e}")
-            return Response({'status': 'error', 'message': 'Internal server error during signature verification.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        print("✅ Webhook signature verified.")
+            return self.process(webhook_data)
+        except Exception:
+            # Let Chapa's retry of this delivery be processed.
+            release_nonce(signature)
+            raise
 
-        # Signature is valid, now we can proceed with the existing logic.
+    def process(self, webhook_data):
         # Chapa sends the full transaction detail in the POST body.
-        webhook_data = request.data
         tx_ref = webhook_data.get('tx_ref')
         
         if not tx_ref:
@@ -314,7 +469,7 @@ class PaymentWebhookView(APIView):
                 user_id = int(tx_ref.split('-')[1])
                 user = User.objects.get(id=user_id)
             except (IndexError, ValueError, User.DoesNotExist):
-                print(f"Could not find user from tx_ref: {tx_ref}")
+                logger.warning("Could not find user from tx_ref: %s", tx_ref)
                 return Response({'status': 'error', 'message': 'Invalid transaction reference format.'}, status=status.HTTP_400_BAD_REQUEST)
 
             # 4. Update user's dashboard
@@ -331,12 +486,12 @@ class PaymentWebhookView(APIView):
             dashboard.subscription_status = 'active'
             dashboard.save()
 
-            print(f"Successfully processed payment for user {user.id}. New expiry: {dashboard.subscription_end_date}")
+            logger.info("Successfully processed payment for user %s. New expiry: %s", user.id, dashboard.subscription_end_date)
             
             # 5. Acknowledge receipt to Chapa
             return Response({'status': 'success'}, status=status.HTTP_200_OK)
         else:
-            print(f"Webhook for tx_ref {tx_ref} was not successful. Status: {webhook_data.get('status')}")
+            logger.info("Webhook for tx_ref %s was not successful. Status: %s", tx_ref, webhook_data.get('status'))
             # Acknowledge receipt, but don't process.
             return Response({'status': 'received, not successful'}, status=status.HTTP_200_OK)
 
@@ -369,9 +524,38 @@ class AdminStatsView(APIView):
             'total_universities': total_universities,
             'active_subscriptions': active_subscriptions,
             'expired_subscriptions': expired_subscriptions,
+            # Dashboard list memberships: favorites, then planned -> applied -> accepted -> visa approved
+            'funnel': funnel_totals(),
         }
         return Response(stats)
 
+class ProfileListView(APIView):
+    """Stored request profiles, newest first (see profiling.py)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(list_profiles())
+
+class ProfileDetailView(APIView):
+    """One profile with its SQL queries and the slowest functions."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        profile = load_profile(profile_id)
+        if profile is None:
+            return Response({'error': 'Profile not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(profile)
+
+class ProfileDownloadView(APIView):
+    """The raw pstats dump of a profile, for snakeviz or `python -m pstats`."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        path = profile_path(profile_id, '.prof')
+        if path is None or not path.is_file():
+            return Response({'error': 'Profile not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name, content_type='application/octet-stream')
+
 class UniversityBulkCreate(APIView):
     permission_classes = [IsAdminUser]
 
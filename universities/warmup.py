@@ -0,0 +1,101 @@
+"""
+Warm-up for freshly started serving processes.
+
+Run by the gunicorn hooks in gunicorn.conf.py: once in the master after the
+app is preloaded, so forked workers inherit the resolved URLconf, serializer
+fields and autocomplete index, and again in every worker before it accepts
+traffic, to connect to the database and fill its catalog caches.
+Every step is idempotent and a failing step is logged rather than raised, so
+a database outage never keeps the server from starting.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.http import QueryDict
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import translation
+
+from .autocomplete import get_index
+from .catalog import facets_cache_key, get_facets
+from .models import University
+from .renderers import ORJSONRenderer
+
+logger = logging.getLogger(__name__)
+
+
+def _views(patterns):
+    """Yield (view class, viewset actions) for every class-based view in `patterns`."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, 'cls', None) or getattr(pattern.callback, 'view_class', None)
+            if view_class is not None:
+                yield view_class, getattr(pattern.callback, 'actions', None) or {}
+
+
+def prime_urls():
+    # Importing and compiling every URL pattern happens on the first reverse().
+    get_resolver()._populate()
+
+
+def prime_serializers():
+    serializer_classes = set()
+    for view_class, actions in _views(get_resolver().url_patterns):
+        if not hasattr(view_class, 'get_serializer_class'):
+            continue
+        # Viewsets may pick a serializer per action (UserViewSet does).
+        for action in set(actions.values()) or [None]:
+            view = view_class(action=action, kwargs={})
+            try:
+                serializer_classes.add(view.get_serializer_class())
+            except (AssertionError, AttributeError):
+                # No serializer_class, or the choice depends on the request.
+                continue
+    for serializer_class in serializer_classes:
+        serializer_class().fields
+
+
+def prime_rendering():
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.gettext('Not found.')
+    ORJSONRenderer().render({'warm': True})
+
+
+def prime_database():
+    # Fails fast if the database is unreachable and pays the driver's first
+    # connect. Request threads open their own connections, which
+    # CONN_MAX_AGE then keeps across requests.
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def prime_catalog():
+    get_facets(University.objects.all(), facets_cache_key(QueryDict()))
+    get_index()
+
+
+STEPS = [
+    ('urls', prime_urls),
+    ('serializers', prime_serializers),
+    ('rendering', prime_rendering),
+    ('database', prime_database),
+    ('catalog', prime_catalog),
+]
+
+
+def warm_up():
+    """Run every warm-up step and return the seconds each one took."""
+    timings = {}
+    for name, step in STEPS:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception('Warm-up step %r failed', name)
+        timings[name] = time.perf_counter() - start
+    # Keep the connection only if CONN_MAX_AGE allows reusing it.
+    close_old_connections()
+    return timings
@@ -0,0 +1,89 @@
+"""
+Signature verification and replay protection for Chapa payment webhooks.
+
+The HMAC-SHA256 signature is checked against the raw request body, before
+anything is parsed, so a forged request costs one hash. Payloads are parsed
+once, with orjson, after they verify. Signatures computed over compact
+re-serialized JSON, which the view used to require, are still accepted
+while WEBHOOK_CANONICAL_FALLBACK is on; that check has to parse the body.
+
+Each verified signature is claimed in the default cache for
+WEBHOOK_REPLAY_WINDOW seconds, so a replayed delivery is acknowledged but
+not processed twice. The cache is shared by all workers when REDIS_URL is
+set.
+"""
+import hashlib
+import hmac
+import json
+
+import orjson
+from django.conf import settings
+from django.core.cache import cache
+
+SIGNATURE_HEADERS = ('Chapa-Signature', 'X-Chapa-Signature')
+NONCE_KEY = 'webhook:nonce:{}'
+
+
+class WebhookRejected(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _sign(secret, payload):
+    return hmac.new(secret, payload, hashlib.sha256).hexdigest().encode('ascii')
+
+
+def _matches(signatures, expected):
+    return any(hmac.compare_digest(signature, expected) for signature in signatures)
+
+
+def _parse(body):
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def verify_payload(body, signatures, secret, canonical_fallback=False):
+    """
+    Return (payload, signature) if one of `signatures` is the HMAC of `body`
+    (or, with `canonical_fallback`, of its compact JSON re-serialization).
+    Raises WebhookRejected otherwise.
+    """
+    secret = secret.encode('utf-8')
+    signatures = [signature.strip().lower().encode('latin-1') for signature in signatures]
+    expected = _sign(secret, body)
+    if _matches(signatures, expected):
+        payload = _parse(body)
+        if payload is None:
+            raise WebhookRejected('Webhook payload is not a JSON object.', 400)
+        return payload, expected.decode('ascii')
+
+    if canonical_fallback:
+        payload = _parse(body)
+        if payload is not None:
+            expected = _sign(secret, json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+            if _matches(signatures, expected):
+                return payload, expected.decode('ascii')
+    raise WebhookRejected('Invalid webhook signature.', 401)
+
+
+def verify_webhook(request):
+    """Verify a webhook request from its raw body and headers; returns (payload, signature)."""
+    if not settings.CHAPA_WEBHOOK_SECRET:
+        raise WebhookRejected('Internal server error: Webhook secret not configured.', 500)
+    signatures = [request.headers[name] for name in SIGNATURE_HEADERS if request.headers.get(name)]
+    if not signatures:
+        raise WebhookRejected('Webhook signature not found.', 401)
+    return verify_payload(request.body, signatures, settings.CHAPA_WEBHOOK_SECRET, settings.WEBHOOK_CANONICAL_FALLBACK)
+
+
+def claim_nonce(signature):
+    """True the first time `signature` is seen within the replay window."""
+    return cache.add(NONCE_KEY.format(signature), 1, timeout=settings.WEBHOOK_REPLAY_WINDOW)
+
+
+def release_nonce(signature):
+    cache.delete(NONCE_KEY.format(signature))
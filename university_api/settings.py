@@ -68,29 +68,88 @@ INSTALLED_APPS = [
 
      'corsheaders',
      'django_filters',
-
-     'djoser',
-     'rest_framework.authtoken',
 ]
 
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_RENDERER_CLASSES': [
+        'universities.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'universities.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # Views opt in by setting `throttle_scope`; buckets live in the default cache.
+    'DEFAULT_THROTTLE_CLASSES': ['universities.throttling.ScopedTokenBucketThrottle'],
+    'DEFAULT_THROTTLE_RATES': {
+        'auth': '10/min',
+        'register': '5/hour',
+        'search': '60/min',
+        'autocomplete': '300/min',
+        'webhook': '120/min',
+    },
+    # Number of reverse proxies in front of the app (1 on Render), used to
+    # read the client IP from X-Forwarded-For for anonymous throttling. Set it
+    # to 0 when serving clients directly. None would key buckets on the whole
+    # client-supplied header, letting clients pick a fresh bucket per request.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 1)),
 }
 
 MIDDLEWARE = [
+    'universities.middleware.RequestMetricsMiddleware',
+    'universities.middleware.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
      'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'universities.middleware.CompressionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'universities.middleware.SiteMiddleware',
+]
+
+# Cookie-based middleware for the admin and other non-API pages. API requests
+# authenticate with JWT and skip it (see universities.middleware.SiteMiddleware).
+API_PATH_PREFIX = '/api/'
+SITE_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+# The admin checks look for these middleware in MIDDLEWARE; they run from
+# SITE_MIDDLEWARE for /admin/ instead.
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
+# Request metrics: per-response Server-Timing headers and the /metrics endpoint.
+# Scrapers authenticate with `Authorization: Bearer <METRICS_TOKEN>`; without a
+# token /metrics is only readable by staff logged in to the admin.
+SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', 'True').lower() == 'true'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# On-demand request profiling (see universities/profiling.py). Staff request a
+# profile with the X-Profile header or ?_profile=1; PROFILING_SAMPLE_RATE also
+# profiles that fraction of all requests. Profiles are listed and downloaded
+# at /api/admin/profiles/.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_HEADER = 'X-Profile'
+PROFILING_ROOT = os.environ.get('PROFILING_ROOT', BASE_DIR / 'profiles')
+PROFILING_KEEP = 50
+
+# Compression of API responses (static files are pre-compressed by WhiteNoise).
+# gzip 5 / brotli 4 / zstd 3 give most of the size reduction for a fraction of
+# the CPU of the maximum levels.
+API_COMPRESSION_MIN_SIZE = 1024
+API_COMPRESSION_GZIP_LEVEL = 5
+API_COMPRESSION_BROTLI_QUALITY = 4
+API_COMPRESSION_ZSTD_LEVEL = 3
+# Lifetime of cached compressed bodies; their keys embed data versions.
+COMPRESSED_VARIANT_TIMEOUT = 60 * 60
 
 ROOT_URLCONF = 'university_api.urls'
 
@@ -119,10 +178,89 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Seconds each request thread keeps its connection open between
+        # requests (0 reconnects on every request).
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
 
+# Cache
+# Cached aggregates and dashboards, throttle buckets and webhook replay nonces
+# must be shared by every gunicorn worker: a per-process cache would keep
+# serving data another worker has invalidated. Multiple workers or instances
+# need REDIS_URL; without it each process has its own in-memory cache and
+# gunicorn.conf.py runs a single worker.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            # The default of 300 entries would evict webhook replay nonces and
+            # throttle buckets during a burst.
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Seconds a computed set of catalog facet counts stays cached. Entries are keyed
+# by the catalog version, so university writes invalidate them immediately.
+FACETS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Versioned catalog snapshots served by /api/catalog/snapshot/
+CATALOG_EXPORT_ROOT = os.environ.get('CATALOG_EXPORT_ROOT', BASE_DIR / 'exports' / 'catalog')
+CATALOG_EXPORT_KEEP = 5
+
+
+# Chapa payment webhooks (see universities/webhooks.py). Signatures are checked
+# over the raw body; the fallback also accepts signatures over compact
+# re-serialized JSON. Verified deliveries are remembered for the replay window.
+CHAPA_WEBHOOK_SECRET = os.environ.get('CHAPA_WEBHOOK_SECRET', '')
+WEBHOOK_CANONICAL_FALLBACK = os.environ.get('WEBHOOK_CANONICAL_FALLBACK', 'True').lower() == 'true'
+WEBHOOK_REPLAY_WINDOW = 60 * 60 * 24
+
+# Application logs go to stdout, where Render collects them.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'universities': {
+            'handlers': ['console'],
+            'level': os.environ.get('LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+# Email and SMS. Reminders (see universities/reminders.py) are sent by the
+# `send_reminders` management command, e.g. from a daily cron job.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'False').lower() == 'true'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'UNI-FINDER <no-reply@localhost>')
+# Empty skips SMS reminders (without logging them as sent); use
+# universities.sms.ConsoleBackend to print them in development.
+SMS_BACKEND = os.environ.get('SMS_BACKEND', '')
+
+REMINDER_DEADLINE_DAYS = 14
+REMINDER_SUBSCRIPTION_DAYS = 3
+# Messages per batch and seconds between batches, per channel.
+REMINDER_BATCH_SIZE = 200
+REMINDER_BATCH_INTERVAL = 1.0
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
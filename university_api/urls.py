@@ -17,12 +17,14 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include, re_path
 from rest_framework_simplejwt.views import TokenRefreshView
-from universities.views import CreateUserView, PaymentWebhookView
+from universities.views import CreateUserView, PaymentWebhookView, metrics
 from universities.serializers import MyTokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
+    # Every attempt runs a PBKDF2 password hash, so bursts are limited per IP.
+    throttle_scope = 'auth'
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -32,5 +34,6 @@ urlpatterns = [
     path('api/token/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view()),
     path('api/', include('universities.urls')),
+    path('metrics', metrics, name='metrics'),
 ]
    
\ No newline at end of file